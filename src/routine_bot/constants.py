@@ -13,5 +13,17 @@ LINE_CHANNEL_ACCESS_TOKEN = os.getenv("LINE_CHANNEL_ACCESS_TOKEN")
 DATABASE_URL = os.getenv("DATABASE_URL", "")
 SENDER_TOKEN = os.getenv("SENDER_TOKEN")
 
+CHAT_ONGOING_TTL_HOURS = int(os.getenv("CHAT_ONGOING_TTL_HOURS", "24"))
+CHAT_RETENTION_DAYS = int(os.getenv("CHAT_RETENTION_DAYS", "30"))
+CHAT_ARCHIVE_ENABLED = os.getenv("CHAT_ARCHIVE_ENABLED", "true").lower() == "true"
+
+RECORD_COMPACTION_MONTHS = int(os.getenv("RECORD_COMPACTION_MONTHS", "12"))
+
+REMINDER_INDEX_ENABLED = os.getenv("REMINDER_INDEX_ENABLED", "false").lower() == "true"
+
+CACHE_INVALIDATION_ENABLED = os.getenv("CACHE_INVALIDATION_ENABLED", "false").lower() == "true"
+
+EVENT_NAME_TRGM_ENABLED = os.getenv("EVENT_NAME_TRGM_ENABLED", "false").lower() == "true"
+
 TZ_TAIPEI = ZoneInfo("Asia/Taipei")
 FREE_PLAN_MAX_EVENTS = 5
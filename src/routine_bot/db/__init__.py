@@ -0,0 +1,5 @@
+import psycopg
+from psycopg.types.string import TextLoader
+
+# ids are native uuid columns but stay plain strings in the models
+psycopg.adapters.register_loader("uuid", TextLoader)
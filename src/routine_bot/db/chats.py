@@ -1,6 +1,8 @@
 import logging
+from datetime import timedelta
 
 import psycopg
+from psycopg.rows import class_row
 from psycopg.types.json import Json
 
 from routine_bot.enums.chat import ChatStatus
@@ -32,7 +34,7 @@ def add_chat(chat: ChatData, conn: psycopg.Connection) -> None:
 
 
 def get_chat(chat_id: str, conn: psycopg.Connection) -> ChatData | None:
-    with conn.cursor() as cur:
+    with conn.cursor(row_factory=class_row(ChatData)) as cur:
         cur.execute(
             """
             SELECT chat_id, user_id, chat_type, current_step, payload, status
@@ -41,58 +43,52 @@ def get_chat(chat_id: str, conn: psycopg.Connection) -> ChatData | None:
             """,
             (chat_id,),
         )
-        result = cur.fetchone()
-        if result is None:
-            return None
-        return ChatData(*result)
+        return cur.fetchone()
 
 
 def get_ongoing_chat(user_id: str, conn: psycopg.Connection) -> ChatData | None:
-    with conn.cursor() as cur:
+    with conn.cursor(row_factory=class_row(ChatData)) as cur:
         cur.execute(
             """
             SELECT chat_id, user_id, chat_type, current_step, payload, status
             FROM chats
-            WHERE user_id = %s AND status = %s
+            WHERE user_id = %s AND status = 'ongoing'
             """,
-            (user_id, ChatStatus.ONGOING.value),
+            (user_id,),
         )
-        result = cur.fetchone()
-        if result is None:
-            return None
-        return ChatData(*result)
+        return cur.fetchone()
 
 
-def set_chat_payload(chat_id: str, payload: dict, conn: psycopg.Connection) -> None:
+def save_chat(chat: ChatData, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
             UPDATE chats
-            SET payload = %s
+            SET current_step = %s, payload = %s, status = %s
             WHERE chat_id = %s
             """,
-            (Json(payload), chat_id),
+            (chat.current_step, Json(chat.payload), chat.status, chat.chat_id),
         )
         if cur.rowcount == 0:
-            raise ChatNotFoundError(f"Chat not found: {chat_id}")
-    ctx_logger = add_context(logger, chat_id=chat_id)
-    ctx_logger.debug(f"Set payload={payload}")
+            raise ChatNotFoundError(f"Chat not found: {chat.chat_id}")
+    ctx_logger = add_context(logger, chat_id=chat.chat_id)
+    ctx_logger.debug(f"Set current_step={chat.current_step}, status={chat.status}, payload={chat.payload}")
 
 
-def set_chat_current_step(chat_id: str, current_step: str | None, conn: psycopg.Connection) -> None:
+def complete_chat(chat_id: str, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
             UPDATE chats
-            SET current_step = %s
+            SET current_step = %s, status = %s
             WHERE chat_id = %s
             """,
-            (current_step, chat_id),
+            (BaseSteps.COMPLETED.value, ChatStatus.COMPLETED.value, chat_id),
         )
         if cur.rowcount == 0:
             raise ChatNotFoundError(f"Chat not found: {chat_id}")
     ctx_logger = add_context(logger, chat_id=chat_id)
-    ctx_logger.debug(f"Set current_step={current_step}")
+    ctx_logger.debug(f"Set current_step={BaseSteps.COMPLETED.value}, status={ChatStatus.COMPLETED.value}")
 
 
 def set_chat_status(chat_id: str, status: str, conn: psycopg.Connection) -> None:
@@ -111,22 +107,80 @@ def set_chat_status(chat_id: str, status: str, conn: psycopg.Connection) -> None
     ctx_logger.debug(f"Set status={status}")
 
 
-def patch_chat_payload(
-    chat: ChatData, new_data: dict[str, str], conn: psycopg.Connection, logger: logging.Logger
-) -> dict[str, str]:
-    ctx_logger = add_context(logger, chat_id=chat.chat_id)
-    for key, val in new_data.items():
-        if chat.payload.get(key) is None:
-            ctx_logger.debug(f"Adding to payload: {key}={val}")
-        else:
-            ctx_logger.debug(f"Overwriting payload: {key}={val} (was {chat.payload[key]})")
-        chat.payload[key] = val
-    set_chat_payload(chat.chat_id, chat.payload, conn)
-    return chat.payload
-
-
-def finalize_chat(chat: ChatData, conn: psycopg.Connection, logger: logging.Logger) -> None:
-    set_chat_current_step(chat.chat_id, BaseSteps.COMPLETED.value, conn)
-    set_chat_status(chat.chat_id, ChatStatus.COMPLETED.value, conn)
-    ctx_logger = add_context(logger, chat_id=chat.chat_id)
-    ctx_logger.info("Chat finalized")
+def abort_stale_chats(ttl: timedelta, conn: psycopg.Connection) -> int:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE chats
+            SET status = %s
+            WHERE status = 'ongoing' AND created_at < NOW() - %s
+            RETURNING chat_id
+            """,
+            (ChatStatus.ABORTED.value, ttl),
+        )
+        aborted_chats = cur.fetchall()
+    for (chat_id,) in aborted_chats:
+        ctx_logger = add_context(logger, chat_id=chat_id)
+        ctx_logger.debug(f"Set status={ChatStatus.ABORTED.value} (ongoing for more than {ttl})")
+    return len(aborted_chats)
+
+
+def archive_finished_chats(older_than: timedelta, conn: psycopg.Connection, batch_size: int = 1000) -> int:
+    """
+    Move completed and aborted chats older than `older_than` into `chats_archive`.
+
+    Rows are moved in batches, each committed on its own, so the job never holds locks on `chats` for long.
+    """
+    archived = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                WITH moved AS (
+                    DELETE FROM chats
+                    WHERE chat_id IN (
+                        SELECT chat_id
+                        FROM chats
+                        WHERE status <> 'ongoing' AND created_at < NOW() - %s
+                        LIMIT %s
+                    )
+                    RETURNING chat_id, created_at, user_id, chat_type, current_step, payload, status
+                )
+                INSERT INTO chats_archive (chat_id, created_at, user_id, chat_type, current_step, payload, status)
+                SELECT chat_id, created_at, user_id, chat_type, current_step, payload, status
+                FROM moved
+                """,
+                (older_than, batch_size),
+            )
+            batch = cur.rowcount
+        conn.commit()
+        archived += batch
+        if batch < batch_size:
+            break
+    logger.debug(f"Chats archived: {archived}")
+    return archived
+
+
+def delete_finished_chats(older_than: timedelta, conn: psycopg.Connection, batch_size: int = 1000) -> int:
+    deleted = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM chats
+                WHERE chat_id IN (
+                    SELECT chat_id
+                    FROM chats
+                    WHERE status <> 'ongoing' AND created_at < NOW() - %s
+                    LIMIT %s
+                )
+                """,
+                (older_than, batch_size),
+            )
+            batch = cur.rowcount
+        conn.commit()
+        deleted += batch
+        if batch < batch_size:
+            break
+    logger.debug(f"Chats deleted: {deleted}")
+    return deleted
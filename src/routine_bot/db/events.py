@@ -1,16 +1,27 @@
+import difflib
 import logging
-from datetime import datetime
+from datetime import date, datetime
 
 import psycopg
+from psycopg.rows import class_row, scalar_row
 
+import routine_bot.db.records as record_db
+import routine_bot.db.reminder_queue as reminder_queue_db
+from routine_bot.constants import EVENT_NAME_TRGM_ENABLED, TZ_TAIPEI
 from routine_bot.errors import EventNotFoundError
+from routine_bot.identity_map import current_identity_map
+from routine_bot.invalidation import invalidation_bus
 from routine_bot.logger import add_context, format_logger_name
-from routine_bot.models import EventData
+from routine_bot.models import EventData, EventDetailData, EventSummaryData
+from routine_bot.name_index import event_name_index
+from routine_bot.reminder_index import reminder_index
+from routine_bot.utils import parse_event_cycle
 
 logger = logging.getLogger(format_logger_name(__name__))
 
 
 def add_event(event: EventData, conn: psycopg.Connection) -> None:
+    cycle_count, cycle_unit = (None, None) if event.event_cycle is None else parse_event_cycle(event.event_cycle)
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -19,20 +30,22 @@ def add_event(event: EventData, conn: psycopg.Connection) -> None:
                 user_id,
                 event_name,
                 reminder_enabled,
-                event_cycle,
+                cycle_count,
+                cycle_unit,
                 last_done_at,
                 next_due_at,
                 share_count,
                 is_active
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """,
             (
                 event.event_id,
                 event.user_id,
                 event.event_name,
                 event.reminder_enabled,
-                event.event_cycle,
+                cycle_count,
+                cycle_unit,
                 event.last_done_at,
                 event.next_due_at,
                 0,
@@ -40,10 +53,15 @@ def add_event(event: EventData, conn: psycopg.Connection) -> None:
             ),
         )
     logger.debug(f"Event inserted: {event.event_id}")
+    reminder_queue_db.sync_event_reminders(event.event_id, conn)
+    invalidation_bus.publish("user", event.user_id, conn)
 
 
 def get_event_by_id(event_id: str, conn: psycopg.Connection) -> EventData | None:
-    with conn.cursor() as cur:
+    identity_map = current_identity_map()
+    if identity_map is not None and (event := identity_map.get_event(event_id)) is not None:
+        return event
+    with conn.cursor(row_factory=class_row(EventData)) as cur:
         cur.execute(
             """
             SELECT
@@ -61,35 +79,17 @@ def get_event_by_id(event_id: str, conn: psycopg.Connection) -> EventData | None
             """,
             (event_id,),
         )
-        result = cur.fetchone()
-        if result is None:
-            return None
-        return EventData(*result)
+        event = cur.fetchone()
+    if identity_map is not None and event is not None:
+        identity_map.add_event(event)
+    return event
 
 
 def get_event_by_name(user_id: str, event_name: str, conn: psycopg.Connection) -> EventData | None:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT
-                event_id,
-                user_id,
-                event_name,
-                reminder_enabled,
-                event_cycle,
-                last_done_at,
-                next_due_at,
-                share_count,
-                is_active
-            FROM events
-            WHERE user_id = %s AND event_name = %s
-            """,
-            (user_id, event_name),
-        )
-        result = cur.fetchone()
-        if result is None:
-            return None
-        return EventData(*result)
+    event_id = get_event_id(user_id, event_name, conn)
+    if event_id is None:
+        return None
+    return get_event_by_id(event_id, conn)
 
 
 def delete_event(event_id: str, conn: psycopg.Connection) -> None:
@@ -98,16 +98,43 @@ def delete_event(event_id: str, conn: psycopg.Connection) -> None:
             """
             DELETE FROM events
             WHERE event_id = %s
+            RETURNING user_id
             """,
             (event_id,),
         )
-        if cur.rowcount == 0:
+        result = cur.fetchone()
+        if result is None:
             raise EventNotFoundError(f"Event not found: {event_id}")
+    # reminder_queue rows are removed by ON DELETE CASCADE
+    reminder_index.discard_event(event_id)
+    invalidation_bus.publish("event", event_id, conn)
+    # the owner's event_count is maintained by a trigger
+    invalidation_bus.publish("user", result[0], conn)
     logger.debug(f"Event deleted: {event_id}")
 
 
-def get_event_id(user_id: str, event_name: str, conn: psycopg.Connection) -> str | None:
+def _get_event_name_index(user_id: str, conn: psycopg.Connection) -> dict[str, str]:
+    event_ids = event_name_index.get(user_id)
+    if event_ids is not None:
+        return event_ids
     with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT event_name, event_id
+            FROM events
+            WHERE user_id = %s
+            """,
+            (user_id,),
+        )
+        event_ids = dict(cur.fetchall())
+    event_name_index.put(user_id, event_ids)
+    ctx_logger = add_context(logger, user_id=user_id)
+    ctx_logger.debug(f"Event name index loaded: {len(event_ids)} events")
+    return event_ids
+
+
+def _get_event_id_from_db(user_id: str, event_name: str, conn: psycopg.Connection) -> str | None:
+    with conn.cursor(row_factory=scalar_row) as cur:
         cur.execute(
             """
             SELECT event_id
@@ -116,60 +143,160 @@ def get_event_id(user_id: str, event_name: str, conn: psycopg.Connection) -> str
             """,
             (user_id, event_name),
         )
-        result = cur.fetchone()
-        if result is None:
-            return None
-        return result[0]
+        return cur.fetchone()
 
 
-def list_events_by_user(user_id: str, conn: psycopg.Connection) -> list[EventData]:
-    with conn.cursor() as cur:
+def get_event_id(user_id: str, event_name: str, conn: psycopg.Connection) -> str | None:
+    """
+    Resolve an owned event's name through the user's event-name index, loading the index on first use.
+
+    Evictions from other processes arrive after their commit, so a hit is checked against the event row, which
+    the identity map keeps for the caller. If the event was renamed or deleted meanwhile, the user's index is
+    dropped and the name is looked up in the table instead. A loaded index answers "not found" without a query.
+    """
+    event_id = _get_event_name_index(user_id, conn).get(event_name)
+    if event_id is None:
+        return None
+    event = get_event_by_id(event_id, conn)
+    if event is not None and event.user_id == user_id and event.event_name == event_name:
+        return event_id
+    ctx_logger = add_context(logger, user_id=user_id)
+    ctx_logger.debug(f"Event name index stale for {event_name!r}, falling back to the table")
+    event_name_index.discard_user(user_id)
+    return _get_event_id_from_db(user_id, event_name, conn)
+
+
+def list_similar_event_names(user_id: str, event_name: str, conn: psycopg.Connection, limit: int = 3) -> list[str]:
+    """
+    List the names of the user's events closest to a name that was not found, best match first.
+
+    Ranked by trigram similarity over `idx_events_name_trgm` when EVENT_NAME_TRGM_ENABLED is set, and by
+    `difflib` over the user's event-name index otherwise.
+    """
+    if not EVENT_NAME_TRGM_ENABLED:
+        event_names = list(_get_event_name_index(user_id, conn))
+        return difflib.get_close_matches(event_name, event_names, n=limit, cutoff=0.3)
+    with conn.cursor(row_factory=scalar_row) as cur:
         cur.execute(
             """
-            SELECT
-                event_id,
-                user_id,
-                event_name,
-                reminder_enabled,
-                event_cycle,
-                last_done_at,
-                next_due_at,
-                share_count,
-                is_active
+            SELECT event_name
             FROM events
-            WHERE user_id = %s
-            ORDER BY last_done_at DESC
+            WHERE user_id = %(user_id)s AND event_name %% %(event_name)s
+            ORDER BY similarity(event_name, %(event_name)s) DESC, event_name
+            LIMIT %(limit)s
             """,
-            (user_id,),
+            {"user_id": user_id, "event_name": event_name, "limit": limit},
         )
-        result = cur.fetchall()
-        return [EventData(*row) for row in result]
+        return cur.fetchall()
 
 
-def list_overdue_events_by_user(user_id: str, conn: psycopg.Connection) -> list[EventData]:
-    with conn.cursor() as cur:
+def list_event_summaries_by_user(user_id: str, conn: psycopg.Connection) -> list[EventSummaryData]:
+    """
+    List the owned events of a user followed by the events shared with them, in one query.
+
+    Shared events carry the owner's stored display name, which is None for owned events and for owners whose
+    name has not been stored yet.
+    """
+    with conn.cursor(row_factory=class_row(EventSummaryData)) as cur:
+        cur.execute(
+            """
+            SELECT event_id, user_id, event_name, reminder_enabled, last_done_at, next_due_at, owner_name
+            FROM (
+                SELECT
+                    e.event_id,
+                    e.user_id,
+                    e.event_name,
+                    e.reminder_enabled,
+                    e.last_done_at,
+                    e.next_due_at,
+                    NULL AS owner_name,
+                    FALSE AS is_shared
+                FROM events e
+                WHERE e.user_id = %(user_id)s
+                UNION ALL
+                SELECT
+                    e.event_id,
+                    e.user_id,
+                    e.event_name,
+                    e.reminder_enabled,
+                    e.last_done_at,
+                    e.next_due_at,
+                    o.display_name AS owner_name,
+                    TRUE AS is_shared
+                FROM shares s
+                JOIN events e ON e.event_id = s.event_id
+                JOIN users o ON o.user_id = e.user_id
+                WHERE s.recipient_id = %(user_id)s
+            ) summaries
+            ORDER BY is_shared, last_done_at DESC
+            """,
+            {"user_id": user_id},
+        )
+        return cur.fetchall()
+
+
+def get_event_detail_by_id(event_id: str, conn: psycopg.Connection, limit: int = 10) -> EventDetailData | None:
+    """
+    Read an event together with its `limit` most recent completion dates and total completion count, in one query.
+
+    Recent dates are read from the months not yet compacted only, so the subquery never scans old partitions.
+    """
+    since = record_db.get_record_history_start(datetime.now(TZ_TAIPEI).date())
+    with conn.cursor(row_factory=class_row(EventDetailData)) as cur:
         cur.execute(
             """
             SELECT
-                event_id,
-                user_id,
-                event_name,
-                reminder_enabled,
-                event_cycle,
-                last_done_at,
-                next_due_at,
-                share_count,
-                is_active
+                e.event_id,
+                e.user_id,
+                e.event_name,
+                e.reminder_enabled,
+                e.event_cycle,
+                e.last_done_at,
+                e.next_due_at,
+                ARRAY(
+                    SELECT r.done_at
+                    FROM records r
+                    WHERE r.event_id = e.event_id AND r.done_at >= %(since)s
+                    ORDER BY r.done_at DESC
+                    LIMIT %(limit)s
+                ) AS recent_records,
+                COALESCE(s.completion_count, 0) AS record_count
+            FROM events e
+            LEFT JOIN event_stats s ON s.event_id = e.event_id
+            WHERE e.event_id = %(event_id)s
+            """,
+            {"event_id": event_id, "since": since, "limit": limit},
+        )
+        return cur.fetchone()
+
+
+def get_event_detail_by_name(
+    user_id: str, event_name: str, conn: psycopg.Connection, limit: int = 10
+) -> EventDetailData | None:
+    event_id = get_event_id(user_id, event_name, conn)
+    if event_id is None:
+        return None
+    return get_event_detail_by_id(event_id, conn, limit)
+
+
+def list_event_choices_by_user(
+    user_id: str, conn: psycopg.Connection, limit: int, offset: int = 0, shared_only: bool = False
+) -> list[tuple[str, str]]:
+    """
+    List the (event_id, event_name) pairs of a user's events for the event picker, most recently done first.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT event_id, event_name
             FROM events
-            WHERE user_id = %s
-            AND reminder_enabled = TRUE
-            AND next_due_at <= NOW()
-            ORDER BY next_due_at ASC
+            WHERE user_id = %(user_id)s AND (NOT %(shared_only)s OR share_count > 0)
+            ORDER BY last_done_at DESC, event_name
+            LIMIT %(limit)s OFFSET %(offset)s
             """,
-            (user_id,),
+            {"user_id": user_id, "shared_only": shared_only, "limit": limit, "offset": offset},
         )
-        result = cur.fetchall()
-        return [EventData(*row) for row in result]
+        return cur.fetchall()
 
 
 def set_event_name(event_id: str, event_name: str, conn: psycopg.Connection) -> None:
@@ -186,6 +313,7 @@ def set_event_name(event_id: str, event_name: str, conn: psycopg.Connection) ->
             raise EventNotFoundError(f"Event not found: {event_id}")
     ctx_logger = add_context(logger, event_id=event_id)
     ctx_logger.debug(f"Set event_name={event_name}")
+    invalidation_bus.publish("event", event_id, conn)
 
 
 def set_event_reminder_enabled(event_id: str, to: bool, conn: psycopg.Connection) -> None:
@@ -202,25 +330,28 @@ def set_event_reminder_enabled(event_id: str, to: bool, conn: psycopg.Connection
             raise EventNotFoundError(f"Event not found: {event_id}")
     ctx_logger = add_context(logger, event_id=event_id)
     ctx_logger.debug(f"Set reminder_enabled={to}")
+    reminder_queue_db.sync_event_reminders(event_id, conn)
+    invalidation_bus.publish("event", event_id, conn)
 
 
-def set_event_cycle(event_id: str, event_cycle: str, conn: psycopg.Connection) -> None:
+def set_event_cycle(event_id: str, cycle_count: int, cycle_unit: str, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
             UPDATE events
-            SET event_cycle = %s
+            SET cycle_count = %s, cycle_unit = %s
             WHERE event_id = %s
             """,
-            (event_cycle, event_id),
+            (cycle_count, cycle_unit, event_id),
         )
         if cur.rowcount == 0:
             raise EventNotFoundError(f"Event not found: {event_id}")
     ctx_logger = add_context(logger, event_id=event_id)
-    ctx_logger.debug(f"Set event_cycle={event_cycle}")
+    ctx_logger.debug(f"Set event_cycle={cycle_count} {cycle_unit}")
+    invalidation_bus.publish("event", event_id, conn)
 
 
-def set_event_last_done_at(event_id: str, last_done_at: datetime, conn: psycopg.Connection) -> None:
+def set_event_last_done_at(event_id: str, last_done_at: date, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -234,9 +365,11 @@ def set_event_last_done_at(event_id: str, last_done_at: datetime, conn: psycopg.
             raise EventNotFoundError(f"Event not found: {event_id}")
     ctx_logger = add_context(logger, event_id=event_id)
     ctx_logger.debug(f"Set last_done_at={last_done_at}")
+    invalidation_bus.publish("event", event_id, conn)
+    recompute_next_due_at([event_id], conn)
 
 
-def set_event_next_due_at(event_id: str, next_due_at: datetime, conn: psycopg.Connection) -> None:
+def set_event_next_due_at(event_id: str, next_due_at: date, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -250,6 +383,134 @@ def set_event_next_due_at(event_id: str, next_due_at: datetime, conn: psycopg.Co
             raise EventNotFoundError(f"Event not found: {event_id}")
     ctx_logger = add_context(logger, event_id=event_id)
     ctx_logger.debug(f"Set next_due_at={next_due_at}")
+    reminder_queue_db.sync_event_reminders(event_id, conn)
+    invalidation_bus.publish("event", event_id, conn)
+
+
+def recompute_next_due_at(event_ids: list[str], conn: psycopg.Connection) -> dict[str, date]:
+    """
+    Set `next_due_at` to `last_done_at` plus one event cycle for every given event that has a cycle, in one UPDATE.
+
+    A month step from the 31st lands on the last day of the next month.
+    Returns the new `next_due_at` of each updated event.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE events
+            SET next_due_at = (
+                last_done_at
+                + make_interval(
+                    months => CASE WHEN cycle_unit = 'month' THEN cycle_count ELSE 0 END,
+                    weeks => CASE WHEN cycle_unit = 'week' THEN cycle_count ELSE 0 END,
+                    days => CASE WHEN cycle_unit = 'day' THEN cycle_count ELSE 0 END
+                )
+            )::date
+            WHERE event_id = ANY(%s::uuid[]) AND cycle_count IS NOT NULL
+            RETURNING event_id, next_due_at
+            """,
+            (event_ids,),
+        )
+        next_due_dates = dict(cur.fetchall())
+    for event_id, next_due_at in next_due_dates.items():
+        ctx_logger = add_context(logger, event_id=event_id)
+        ctx_logger.debug(f"Set next_due_at={next_due_at}")
+    invalidation_bus.publish_many("event", next_due_dates, conn)
+    if next_due_dates:
+        reminder_queue_db.sync_reminders_by_events(list(next_due_dates), conn)
+    return next_due_dates
+
+
+def reconcile_next_due_at(
+    conn: psycopg.Connection,
+    user_id: str | None = None,
+    after: str | None = None,
+    dry_run: bool = False,
+    batch_size: int = 5000,
+    sample_size: int = 20,
+) -> tuple[int, int, list[tuple[str, date | None, date]], str | None]:
+    """
+    Recompute `next_due_at` from `last_done_at` and the event cycle for all events, or only those of `user_id`.
+
+    Events are walked in `event_id` order in batches of `batch_size`. Each batch is one set-based UPDATE that only
+    touches drifted rows and is committed on its own, so an interrupted run resumes by passing the last reported
+    event_id as `after`. With `dry_run`, nothing is written and the drift is only reported.
+
+    Returns the number of events checked, the number of drifted events, up to `sample_size` drifted
+    (event_id, old next_due_at, new next_due_at) entries and the last event_id processed.
+    """
+    checked = 0
+    drifted = 0
+    samples = []
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                WITH batch AS (
+                    SELECT
+                        event_id,
+                        next_due_at AS old_next_due_at,
+                        (
+                            last_done_at
+                            + make_interval(
+                                months => CASE WHEN cycle_unit = 'month' THEN cycle_count ELSE 0 END,
+                                weeks => CASE WHEN cycle_unit = 'week' THEN cycle_count ELSE 0 END,
+                                days => CASE WHEN cycle_unit = 'day' THEN cycle_count ELSE 0 END
+                            )
+                        )::date AS new_next_due_at
+                    FROM events
+                    WHERE cycle_count IS NOT NULL
+                    AND (%(after)s::uuid IS NULL OR event_id > %(after)s::uuid)
+                    AND (%(user_id)s::text IS NULL OR user_id = %(user_id)s)
+                    ORDER BY event_id
+                    LIMIT %(batch_size)s
+                ),
+                updated AS (
+                    UPDATE events e
+                    SET next_due_at = b.new_next_due_at
+                    FROM batch b
+                    WHERE e.event_id = b.event_id
+                    AND NOT %(dry_run)s
+                    AND e.next_due_at IS DISTINCT FROM b.new_next_due_at
+                )
+                SELECT
+                    event_id,
+                    old_next_due_at,
+                    new_next_due_at,
+                    old_next_due_at IS DISTINCT FROM new_next_due_at AS is_drifted,
+                    (SELECT COUNT(*) FROM batch) AS batch_count
+                FROM batch
+                WHERE old_next_due_at IS DISTINCT FROM new_next_due_at
+                OR event_id = (SELECT event_id FROM batch ORDER BY event_id DESC LIMIT 1)
+                ORDER BY event_id
+                """,
+                {
+                    "after": after,
+                    "user_id": user_id,
+                    "dry_run": dry_run,
+                    "batch_size": batch_size,
+                },
+            )
+            rows = cur.fetchall()
+        if not rows:
+            break
+        drifted_ids = [event_id for event_id, _, _, is_drifted, _ in rows if is_drifted]
+        if drifted_ids and not dry_run:
+            reminder_queue_db.sync_reminders_by_events(drifted_ids, conn)
+            invalidation_bus.publish_many("event", drifted_ids, conn)
+        conn.commit()
+
+        batch_count = rows[0][4]
+        after = rows[-1][0]
+        checked += batch_count
+        drifted += len(drifted_ids)
+        for event_id, old_next_due_at, new_next_due_at, is_drifted, _ in rows:
+            if is_drifted and len(samples) < sample_size:
+                samples.append((event_id, old_next_due_at, new_next_due_at))
+        logger.info(f"next_due_at batch done: {len(drifted_ids)}/{batch_count} drifted, after={after}")
+        if batch_count < batch_size:
+            break
+    return checked, drifted, samples, after
 
 
 def set_event_activeness(event_id: str, to: bool, conn: psycopg.Connection) -> None:
@@ -266,6 +527,7 @@ def set_event_activeness(event_id: str, to: bool, conn: psycopg.Connection) -> N
             raise EventNotFoundError(f"Event not found: {event_id}")
     ctx_logger = add_context(logger, event_id=event_id)
     ctx_logger.debug(f"Set is_active={to}")
+    invalidation_bus.publish("event", event_id, conn)
 
 
 def set_all_events_activeness_by_user(user_id: str, to: bool, conn: psycopg.Connection) -> None:
@@ -283,30 +545,72 @@ def set_all_events_activeness_by_user(user_id: str, to: bool, conn: psycopg.Conn
         for row in result:
             ctx_logger = add_context(logger, event_id=row[0])
             ctx_logger.debug(f"Set is_active={to}")
+    invalidation_bus.publish_many("event", [row[0] for row in result], conn)
     ctx_logger = add_context(logger, user_id=user_id)
     ctx_logger.debug(f"Set is_active={to} for all events")
 
 
-def increment_event_share_count(event_id: str, by: int, conn: psycopg.Connection) -> None:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            UPDATE events
-            SET share_count = share_count + %s
-            WHERE event_id = %s
-            RETURNING share_count
-            """,
-            (by, event_id),
-        )
-        result = cur.fetchone()
-        if result is None:
-            raise EventNotFoundError(f"Event not found: {event_id}")
-    ctx_logger = add_context(logger, event_id=event_id)
-    ctx_logger.debug(f"Set share_count={result[0]}")
+def reconcile_event_share_counts(conn: psycopg.Connection, batch_size: int = 1000) -> list[tuple[str, int, int]]:
+    """
+    Recompute `share_count` from the shares table and correct the events whose counter drifted.
+
+    Events are walked in `event_id` order and each batch is committed on its own. A batch is locked before its
+    shares are counted, in a separate statement, so the count sees every share whose trigger got the lock first,
+    and shares added later wait for the commit and increment the corrected value. Returns the corrected
+    (event_id, old count, new count) entries.
+    """
+    corrected = []
+    after = None
+    while True:
+        with conn.cursor(row_factory=scalar_row) as cur:
+            cur.execute(
+                """
+                SELECT event_id
+                FROM events
+                WHERE %(after)s::uuid IS NULL OR event_id > %(after)s::uuid
+                ORDER BY event_id
+                LIMIT %(batch_size)s
+                FOR UPDATE
+                """,
+                {"after": after, "batch_size": batch_size},
+            )
+            event_ids = cur.fetchall()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE events e
+                SET share_count = a.share_count
+                FROM (
+                    SELECT b.event_id, COUNT(s.share_id) AS share_count
+                    FROM unnest(%s::uuid[]) AS b(event_id)
+                    LEFT JOIN shares s ON s.event_id = b.event_id
+                    GROUP BY b.event_id
+                ) a, events old
+                WHERE e.event_id = a.event_id
+                AND old.event_id = a.event_id
+                AND e.share_count <> a.share_count
+                RETURNING e.event_id, old.share_count AS old_count, e.share_count AS new_count
+                """,
+                (event_ids,),
+            )
+            rows = cur.fetchall()
+        conn.commit()
+        for event_id, old_count, new_count in rows:
+            ctx_logger = add_context(logger, event_id=event_id)
+            ctx_logger.debug(f"Set share_count={new_count} (was {old_count})")
+            corrected.append((event_id, old_count, new_count))
+        if len(event_ids) < batch_size:
+            break
+        after = event_ids[-1]
+    return corrected
 
 
 def is_event_name_duplicated(user_id: str, event_name: str, conn: psycopg.Connection) -> bool:
+    # a miss in the index may be an event created by another process, and inserting it again would fail on
+    # UNIQUE (user_id, event_name), so only a hit is trusted
     event_id = get_event_id(user_id, event_name, conn)
+    if event_id is None:
+        event_id = _get_event_id_from_db(user_id, event_name, conn)
     if event_id is None:
         return False
     return True
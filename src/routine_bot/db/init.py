@@ -1,7 +1,12 @@
 import logging
 
 import psycopg
+from psycopg import sql
 
+from routine_bot.constants import EVENT_NAME_TRGM_ENABLED
+from routine_bot.db.records import ensure_record_partition
+from routine_bot.db.reminder_queue import rebuild_reminder_queue
+from routine_bot.db.stats import rebuild_event_stats
 from routine_bot.logger import format_logger_name
 
 logger = logging.getLogger(format_logger_name(__name__))
@@ -13,6 +18,37 @@ def _table_exists(cur: psycopg.Cursor, table_name: str) -> bool:
     return result is not None and result[0] is not None
 
 
+def _column_exists(cur: psycopg.Cursor, table_name: str, column_name: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s AND column_name = %s
+        """,
+        (table_name, column_name),
+    )
+    return cur.fetchone() is not None
+
+
+def _column_type(cur: psycopg.Cursor, table_name: str, column_name: str) -> str | None:
+    cur.execute(
+        """
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s AND column_name = %s
+        """,
+        (table_name, column_name),
+    )
+    result = cur.fetchone()
+    return result[0] if result is not None else None
+
+
+def _index_exists(cur: psycopg.Cursor, index_name: str) -> bool:
+    cur.execute("SELECT to_regclass(%s)", (f"public.{index_name}",))
+    result = cur.fetchone()
+    return result is not None and result[0] is not None
+
+
 def _create_users_table(cur: psycopg.Cursor) -> None:
     """
     Users Table
@@ -21,9 +57,12 @@ def _create_users_table(cur: psycopg.Cursor) -> None:
         Unique identifier for each user (corresponds to the LINE user ID).
     - created_at :
         Timestamp when the user record was created.
+    - display_name :
+        The user's LINE display name, stored so read models can show owners without calling the LINE API.
     - event_count :
         Total number of events owned by the user.
         Users on free plan can have up to 5 events.
+        Maintained by a trigger on `events` (see `_create_counter_triggers`).
     - time_slot :
         The user's preferred daily notification hour (on the hour, HH:00).
         Used to determine when daily reminder jobs should be sent.
@@ -46,6 +85,7 @@ def _create_users_table(cur: psycopg.Cursor) -> None:
         CREATE TABLE users (
             user_id TEXT PRIMARY KEY,
             created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            display_name TEXT,
             event_count INTEGER NOT NULL DEFAULT 0,
             time_slot TIME NOT NULL DEFAULT '00:00',
             is_premium BOOLEAN NOT NULL DEFAULT FALSE,
@@ -82,7 +122,7 @@ def _create_chats_table(cur: psycopg.Cursor) -> None:
     cur.execute(
         """
         CREATE TABLE chats (
-            chat_id TEXT PRIMARY KEY,
+            chat_id UUID PRIMARY KEY,
             created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
             user_id TEXT NOT NULL REFERENCES users(user_id),
             chat_type TEXT NOT NULL,
@@ -92,7 +132,34 @@ def _create_chats_table(cur: psycopg.Cursor) -> None:
         )
         """
     )
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_chats_user_status ON chats (user_id, status)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_chats_user_ongoing ON chats (user_id) WHERE status = 'ongoing'")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_chats_created_at ON chats (created_at)")
+
+
+def _create_chats_archive_table(cur: psycopg.Cursor) -> None:
+    """
+    Chats Archive Table
+    -------------------
+    Completed and aborted chats moved out of `chats` by the retention job.
+    Same columns as `chats`, plus:
+
+    - archived_at :
+        Timestamp when the chat was moved into the archive.
+    """
+    cur.execute(
+        """
+        CREATE TABLE chats_archive (
+            chat_id UUID PRIMARY KEY,
+            created_at TIMESTAMPTZ NOT NULL,
+            user_id TEXT NOT NULL,
+            chat_type TEXT NOT NULL,
+            current_step TEXT,
+            payload JSON,
+            status TEXT NOT NULL,
+            archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
 
 
 def _create_events_table(cur: psycopg.Cursor) -> None:
@@ -109,18 +176,21 @@ def _create_events_table(cur: psycopg.Cursor) -> None:
         Name of the event.
     - reminder_enabled :
         Indicates whether reminders are enabled for the event.
+    - cycle_count :
+        Number of cycle units between two completions (e.g., the 3 in "3 day").
+    - cycle_unit :
+        Unit of the recurrence interval, one of "day", "week" or "month".
     - event_cycle :
-        Specifies the recurrence interval of the event (e.g., daily, weekly).
+        Display form of the recurrence interval (e.g., "3 day"), generated from `cycle_count` and `cycle_unit`.
     - last_done_at :
-        Timestamp of the most recent time the user completed the event.
-        Event completion timestamps are stored at day-level precision,
-        with the time set to 00:00 (UTC+8).
+        Local (UTC+8) date of the most recent time the user completed the event.
     - next_due_at :
-        If the current time is later than this timestamp, the event is considered due,
+        Local (UTC+8) date from which the event is considered due,
         and the bot will send the reminder on its next scheduled run.
     - share_count :
         The number of users this event is shared with.
         All shared users will also receive reminder notifications.
+        Maintained by a trigger on `shares` (see `_create_counter_triggers`).
     - is_active :
         If a user blocks the bot, the events they own are marked as inactive,
         and their associated reminders will no longer be triggered.
@@ -129,14 +199,16 @@ def _create_events_table(cur: psycopg.Cursor) -> None:
     cur.execute(
         """
         CREATE TABLE events (
-            event_id TEXT PRIMARY KEY,
+            event_id UUID PRIMARY KEY,
             created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
             user_id TEXT NOT NULL REFERENCES users(user_id),
             event_name TEXT NOT NULL,
             reminder_enabled BOOLEAN NOT NULL,
-            event_cycle TEXT,
-            last_done_at TIMESTAMPTZ NOT NULL,
-            next_due_at TIMESTAMPTZ,
+            cycle_count INTEGER CHECK (cycle_count > 0),
+            cycle_unit TEXT CHECK (cycle_unit IN ('day', 'week', 'month')),
+            event_cycle TEXT GENERATED ALWAYS AS (cycle_count::text || ' ' || cycle_unit) STORED,
+            last_done_at DATE NOT NULL,
+            next_due_at DATE,
             share_count INTEGER NOT NULL DEFAULT 0,
             is_active BOOLEAN NOT NULL DEFAULT TRUE,
             -- Prevent duplicate event names per user
@@ -150,6 +222,9 @@ def _create_records_table(cur: psycopg.Cursor) -> None:
     """
     Records Table
     --------------
+    Partitioned by month on `done_at` (see `ensure_record_partition` in `db/records.py`),
+    so storage and vacuum work stay proportional to recent activity.
+
     - record_id :
         Unique identifier for each completion record.
     - created_at :
@@ -161,20 +236,97 @@ def _create_records_table(cur: psycopg.Cursor) -> None:
     - user_id :
         ID of the user who owns the event.
     - done_at :
-        Date the event was marked as completed (00:00 UTC+8 precision).
+        Local (UTC+8) date the event was marked as completed.
     """
     cur.execute(
         """
         CREATE TABLE records (
-            record_id TEXT PRIMARY KEY,
+            record_id UUID NOT NULL,
             created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            event_id TEXT NOT NULL REFERENCES events(event_id),
+            event_id UUID NOT NULL REFERENCES events(event_id),
             event_name TEXT NOT NULL,
             user_id TEXT NOT NULL REFERENCES users(user_id),
-            done_at TIMESTAMPTZ NOT NULL
+            done_at DATE NOT NULL,
+            -- the partition key must be part of the primary key
+            PRIMARY KEY (record_id, done_at)
+        ) PARTITION BY RANGE (done_at)
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_records_event_done_at ON records (event_id, done_at DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_records_done_at_brin ON records USING brin (done_at)")
+
+
+def _create_record_rollups_table(cur: psycopg.Cursor) -> None:
+    """
+    Record Rollups Table
+    --------------------
+    Monthly per-event summaries of completion records older than the compaction horizon.
+    The raw rows of a month are dropped once they are folded in here.
+
+    - event_id :
+        ID of the related event.
+    - month :
+        First day of the local (UTC+8) month summarised by the row.
+    - record_count :
+        Number of completion records in the month.
+    - first_done_at :
+        Earliest completion date in the month.
+    - last_done_at :
+        Latest completion date in the month.
+    """
+    cur.execute(
+        """
+        CREATE TABLE record_rollups (
+            event_id UUID NOT NULL REFERENCES events(event_id),
+            month DATE NOT NULL,
+            record_count INTEGER NOT NULL,
+            first_done_at DATE NOT NULL,
+            last_done_at DATE NOT NULL,
+            PRIMARY KEY (event_id, month)
+        )
+        """
+    )
+
+
+def _create_event_stats_table(cur: psycopg.Cursor) -> None:
+    """
+    Event Stats Table
+    -----------------
+    Running completion statistics per event, folded in one record at a time by `update_event_stats`
+    (see `db/stats.py`) so reading them never scans `records`.
+
+    - event_id :
+        ID of the related event.
+    - completion_count :
+        Number of completion records of the event.
+    - last_done_at :
+        Latest completion date folded into the statistics.
+    - interval_count :
+        Number of gaps between consecutive completion dates.
+    - interval_days_sum :
+        Total length of those gaps in days, for the average interval.
+    - on_time_count :
+        Number of gaps no longer than the event cycle.
+    - current_streak :
+        Consecutive on-time completions up to `last_done_at`.
+    - longest_streak :
+        Longest run of consecutive on-time completions so far.
+    """
+    cur.execute(
+        """
+        CREATE TABLE event_stats (
+            event_id UUID PRIMARY KEY REFERENCES events(event_id) ON DELETE CASCADE,
+            completion_count INTEGER NOT NULL DEFAULT 0,
+            last_done_at DATE NOT NULL,
+            interval_count INTEGER NOT NULL DEFAULT 0,
+            interval_days_sum INTEGER NOT NULL DEFAULT 0,
+            on_time_count INTEGER NOT NULL DEFAULT 0,
+            current_streak INTEGER NOT NULL DEFAULT 0,
+            longest_streak INTEGER NOT NULL DEFAULT 0
         )
         """
     )
+    rebuild_event_stats(cur.connection)
 
 
 def _create_shares_table(cur: psycopg.Cursor) -> None:
@@ -198,28 +350,340 @@ def _create_shares_table(cur: psycopg.Cursor) -> None:
     cur.execute(
         """
         CREATE TABLE shares (
-            share_id TEXT PRIMARY KEY,
+            share_id UUID PRIMARY KEY,
             created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-            event_id TEXT NOT NULL REFERENCES events(event_id),
+            event_id UUID NOT NULL REFERENCES events(event_id),
             event_name TEXT NOT NULL,
             owner_id TEXT NOT NULL REFERENCES users(user_id),
             recipient_id TEXT NOT NULL
         )
         """
     )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_shares_recipient ON shares (recipient_id)")
+
+
+def _create_reminder_queue_table(cur: psycopg.Cursor) -> None:
+    """
+    Reminder Queue Table
+    --------------------
+    Precomputed reminder work set, kept in sync by the event, share and user mutation functions in `db/`.
+    The sender only range-scans the primary key for the current time slot.
+
+    - time_slot :
+        The recipient's notification time slot.
+    - due_date :
+        The event's next_due_at.
+    - recipient_id :
+        The user who receives the reminder, either the event owner or a share recipient.
+    - event_id :
+        Identifier of the event to be reminded of.
+    """
+    cur.execute(
+        """
+        CREATE TABLE reminder_queue (
+            time_slot TIME NOT NULL,
+            due_date DATE NOT NULL,
+            recipient_id TEXT NOT NULL,
+            event_id UUID NOT NULL REFERENCES events(event_id) ON DELETE CASCADE,
+            PRIMARY KEY (time_slot, due_date, recipient_id, event_id)
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reminder_queue_event ON reminder_queue (event_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_reminder_queue_recipient ON reminder_queue (recipient_id)")
+    rebuild_reminder_queue(cur.connection)
+
+
+def _migrate_chats_ongoing_index(cur: psycopg.Cursor) -> None:
+    """
+    Replace the full (user_id, status) index with a partial index over ongoing chats only.
+    """
+    if not _index_exists(cur, "idx_chats_user_status"):
+        return
+    logger.info("Migrating chats index: idx_chats_user_status -> idx_chats_user_ongoing")
+    cur.execute("DROP INDEX idx_chats_user_status")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_chats_user_ongoing ON chats (user_id) WHERE status = 'ongoing'")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_chats_created_at ON chats (created_at)")
+
+
+def _migrate_records_partitioning(cur: psycopg.Cursor) -> None:
+    """
+    Move an unpartitioned `records` table into the monthly partitioned layout.
+    """
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = 'public.records'::regclass")
+    result = cur.fetchone()
+    if result is None or result[0] == "p":
+        return
+    logger.info("Migrating records table to monthly partitions")
+    cur.execute("ALTER TABLE records RENAME TO records_legacy")
+    cur.execute("ALTER INDEX records_pkey RENAME TO records_legacy_pkey")
+    _create_records_table(cur)
+    cur.execute(
+        """
+        SELECT DISTINCT date_trunc('month', done_at)::date
+        FROM records_legacy
+        """
+    )
+    for (month,) in cur.fetchall():
+        ensure_record_partition(month, cur.connection)
+    cur.execute(
+        """
+        INSERT INTO records (record_id, created_at, event_id, event_name, user_id, done_at)
+        SELECT record_id, created_at, event_id, event_name, user_id, done_at
+        FROM records_legacy
+        """
+    )
+    logger.info(f"Records migrated: {cur.rowcount}")
+    cur.execute("DROP TABLE records_legacy")
+
+
+def _migrate_events_structured_cycle(cur: psycopg.Cursor) -> None:
+    """
+    Split the free-text `event_cycle` into `cycle_count` and `cycle_unit`, keeping `event_cycle` as a generated column.
+    """
+    if _column_exists(cur, "events", "cycle_count"):
+        return
+    logger.info("Migrating events table to structured event cycles")
+    cur.execute(
+        """
+        ALTER TABLE events
+        ADD COLUMN cycle_count INTEGER CHECK (cycle_count > 0),
+        ADD COLUMN cycle_unit TEXT CHECK (cycle_unit IN ('day', 'week', 'month'))
+        """
+    )
+    cur.execute(
+        """
+        UPDATE events
+        SET cycle_count = split_part(event_cycle, ' ', 1)::int,
+            cycle_unit = split_part(event_cycle, ' ', 2)
+        WHERE event_cycle IS NOT NULL
+        """
+    )
+    logger.info(f"Event cycles migrated: {cur.rowcount}")
+    cur.execute("ALTER TABLE events DROP COLUMN event_cycle")
+    cur.execute(
+        """
+        ALTER TABLE events
+        ADD COLUMN event_cycle TEXT GENERATED ALWAYS AS (cycle_count::text || ' ' || cycle_unit) STORED
+        """
+    )
+
+
+def _migrate_native_uuid(cur: psycopg.Cursor) -> None:
+    """
+    Convert the TEXT uuid keys and the columns referencing them to the native `uuid` type.
+
+    Foreign keys to `events` are dropped for the conversion and recreated from their original definitions.
+    """
+    if _column_type(cur, "events", "event_id") != "text":
+        return
+    logger.info("Migrating id columns to native uuid")
+    uuid_columns = {
+        "chats": ["chat_id"],
+        "chats_archive": ["chat_id"],
+        "events": ["event_id"],
+        "records": ["record_id", "event_id"],
+        "record_rollups": ["event_id"],
+        "shares": ["share_id", "event_id"],
+        "reminder_queue": ["event_id"],
+        "event_stats": ["event_id"],
+    }
+    cur.execute(
+        """
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = 'public.events'::regclass AND conparentid = 0
+        """
+    )
+    foreign_keys = cur.fetchall()
+    for table, constraint, _ in foreign_keys:
+        cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(sql.SQL(table), sql.Identifier(constraint)))
+    for table, columns in uuid_columns.items():
+        if not _table_exists(cur, table):
+            continue
+        for column in columns:
+            cur.execute(
+                sql.SQL("ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid").format(
+                    table=sql.Identifier(table), column=sql.Identifier(column)
+                )
+            )
+    for table, constraint, definition in foreign_keys:
+        cur.execute(
+            sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}").format(
+                sql.SQL(table), sql.Identifier(constraint), sql.SQL(definition)
+            )
+        )
+
+
+def _migrate_day_precision_dates(cur: psycopg.Cursor) -> None:
+    """
+    Convert the day-precision TIMESTAMPTZ columns (local midnights) to DATE.
+
+    `records.done_at` is the partition key and cannot change type in place, so a partitioned `records` table is
+    rebuilt through a staging copy.
+    """
+    date_columns = {
+        "events": ["last_done_at", "next_due_at"],
+        "record_rollups": ["first_done_at", "last_done_at"],
+        "event_stats": ["last_done_at"],
+    }
+    for table, columns in date_columns.items():
+        for column in columns:
+            if _column_type(cur, table, column) != "timestamp with time zone":
+                continue
+            logger.info(f"Migrating {table}.{column} to DATE")
+            cur.execute(
+                sql.SQL(
+                    """
+                    ALTER TABLE {table}
+                    ALTER COLUMN {column} TYPE date USING ({column} AT TIME ZONE 'Asia/Taipei')::date
+                    """
+                ).format(table=sql.Identifier(table), column=sql.Identifier(column))
+            )
+
+    if _column_type(cur, "records", "done_at") != "timestamp with time zone":
+        return
+    logger.info("Migrating records.done_at to DATE")
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = 'public.records'::regclass")
+    if cur.fetchone()[0] != "p":
+        # the partitioning migration copies the converted rows later on
+        cur.execute(
+            """
+            ALTER TABLE records
+            ALTER COLUMN done_at TYPE date USING (done_at AT TIME ZONE 'Asia/Taipei')::date
+            """
+        )
+        return
+    cur.execute(
+        """
+        CREATE TEMPORARY TABLE records_staging ON COMMIT DROP AS
+        SELECT
+            record_id,
+            created_at,
+            event_id,
+            event_name,
+            user_id,
+            (done_at AT TIME ZONE 'Asia/Taipei')::date AS done_at
+        FROM records
+        """
+    )
+    cur.execute("DROP TABLE records")
+    _create_records_table(cur)
+    cur.execute("SELECT DISTINCT date_trunc('month', done_at)::date FROM records_staging")
+    for (month,) in cur.fetchall():
+        ensure_record_partition(month, cur.connection)
+    cur.execute(
+        """
+        INSERT INTO records (record_id, created_at, event_id, event_name, user_id, done_at)
+        SELECT record_id, created_at, event_id, event_name, user_id, done_at
+        FROM records_staging
+        """
+    )
+    logger.info(f"Records migrated: {cur.rowcount}")
+    cur.execute("DROP TABLE records_staging")
+
+
+def _migrate_users_display_name(cur: psycopg.Cursor) -> None:
+    """
+    Add the stored display name to `users` and index shares by recipient for the /viewall read model.
+    """
+    if _column_exists(cur, "users", "display_name"):
+        return
+    logger.info("Migrating users table: adding display_name")
+    cur.execute("ALTER TABLE users ADD COLUMN display_name TEXT")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_shares_recipient ON shares (recipient_id)")
+
+
+def _create_event_name_trgm_index(cur: psycopg.Cursor) -> None:
+    """
+    Index event names by trigram per user, for the nearest-name suggestions of `list_similar_event_names`.
+
+    Only created when EVENT_NAME_TRGM_ENABLED is set, since `pg_trgm` and `btree_gin` need to be available.
+    """
+    if not EVENT_NAME_TRGM_ENABLED or _index_exists(cur, "idx_events_name_trgm"):
+        return
+    logger.info("Creating trigram index on events.event_name")
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cur.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    cur.execute("CREATE INDEX idx_events_name_trgm ON events USING GIN (user_id, event_name gin_trgm_ops)")
+
+
+def _create_counter_triggers(cur: psycopg.Cursor) -> None:
+    """
+    Keep `users.event_count` and `events.share_count` in step with inserts and deletes on `events` and `shares`.
+    """
+    cur.execute(
+        """
+        CREATE OR REPLACE FUNCTION sync_user_event_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE users SET event_count = event_count + 1 WHERE user_id = NEW.user_id;
+            ELSE
+                UPDATE users SET event_count = event_count - 1 WHERE user_id = OLD.user_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE TRIGGER trg_events_user_event_count
+        AFTER INSERT OR DELETE ON events
+        FOR EACH ROW EXECUTE FUNCTION sync_user_event_count()
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE FUNCTION sync_event_share_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE events SET share_count = share_count + 1 WHERE event_id = NEW.event_id;
+            ELSE
+                UPDATE events SET share_count = share_count - 1 WHERE event_id = OLD.event_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    cur.execute(
+        """
+        CREATE OR REPLACE TRIGGER trg_shares_event_share_count
+        AFTER INSERT OR DELETE ON shares
+        FOR EACH ROW EXECUTE FUNCTION sync_event_share_count()
+        """
+    )
 
 
 def init_db(conn: psycopg.Connection):
     table_creators = {
         "users": _create_users_table,
         "chats": _create_chats_table,
+        "chats_archive": _create_chats_archive_table,
         "events": _create_events_table,
         "records": _create_records_table,
+        "record_rollups": _create_record_rollups_table,
+        "event_stats": _create_event_stats_table,
         "shares": _create_shares_table,
+        "reminder_queue": _create_reminder_queue_table,
     }
+    migrations = [
+        _migrate_chats_ongoing_index,
+        _migrate_records_partitioning,
+        _migrate_events_structured_cycle,
+        _migrate_users_display_name,
+        _create_counter_triggers,
+        _create_event_name_trgm_index,
+    ]
     with conn.cursor() as cur:
+        # new tables reference and backfill from existing ones, so their column types are converted first
+        _migrate_native_uuid(cur)
+        _migrate_day_precision_dates(cur)
         for table, creator_func in table_creators.items():
             if _table_exists(cur, table):
                 continue
             creator_func(cur)
             logger.info(f"Creating table: {table}")
+        for migrate_func in migrations:
+            migrate_func(cur)
@@ -1,15 +1,51 @@
 import logging
-from datetime import datetime
+from datetime import date, datetime
 
 import psycopg
+from dateutil.relativedelta import relativedelta
+from psycopg import sql
+from psycopg.rows import scalar_row
 
+from routine_bot.constants import RECORD_COMPACTION_MONTHS
 from routine_bot.logger import add_context, format_logger_name
 from routine_bot.models import RecordData
 
 logger = logging.getLogger(format_logger_name(__name__))
 
+# partitions known to exist, so that inserts only pay for the DDL once per month per process
+_record_partitions: set[str] = set()
 
-def add_record(record: RecordData, conn: psycopg.Connection) -> None:
+
+def get_record_history_start(today: date) -> date:
+    """
+    Return the first day of the oldest month kept in `records`, which is also the compaction horizon.
+
+    Bounding history reads by it lets the planner prune every partition compaction would fold into `record_rollups`.
+    """
+    return today.replace(day=1) - relativedelta(months=RECORD_COMPACTION_MONTHS)
+
+
+def ensure_record_partition(done_at: date, conn: psycopg.Connection) -> None:
+    """
+    Make sure the monthly partition of `records` holding `done_at` exists.
+    """
+    start = done_at.replace(day=1)
+    end = start + relativedelta(months=1)
+    partition = f"records_p{start:%Y%m}"
+    if partition in _record_partitions:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF records FOR VALUES FROM ({}) TO ({})").format(
+                sql.Identifier(partition), sql.Literal(start), sql.Literal(end)
+            )
+        )
+    _record_partitions.add(partition)
+    logger.debug(f"Record partition ensured: {partition}")
+
+
+def _insert_record(record: RecordData, conn: psycopg.Connection) -> None:
+    ensure_record_partition(record.done_at, conn)
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -24,24 +60,20 @@ def add_record(record: RecordData, conn: psycopg.Connection) -> None:
                 record.done_at,
             ),
         )
-    ctx_logger = add_context(logger, record_id=record.record_id)
-    ctx_logger.debug("Record inserted")
 
 
-def list_event_recent_records(event_id: str, conn: psycopg.Connection, limit: int = 10) -> list[datetime]:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT done_at
-            FROM records
-            WHERE event_id = %s
-            ORDER BY done_at DESC
-            LIMIT %s
-            """,
-            (event_id, limit),
-        )
-        result = cur.fetchall()
-        return [row[0] for row in result]
+def add_record(record: RecordData, conn: psycopg.Connection) -> None:
+    try:
+        with conn.transaction():
+            _insert_record(record, conn)
+    except psycopg.errors.CheckViolation:
+        # the cached partition was created in a rolled back transaction or dropped by another worker's compaction,
+        # the savepoint kept the caller's transaction usable, so forget the cache and create it again
+        logger.info(f"Record partition missing for {record.done_at}, retrying")
+        _record_partitions.clear()
+        _insert_record(record, conn)
+    ctx_logger = add_context(logger, record_id=record.record_id)
+    ctx_logger.debug("Record inserted")
 
 
 def delete_records_by_event(event_id: str, conn: psycopg.Connection) -> None:
@@ -58,3 +90,66 @@ def delete_records_by_event(event_id: str, conn: psycopg.Connection) -> None:
         deleted_records = [row[0] for row in cur.fetchall()]
         for record_id in deleted_records:
             ctx_logger.debug(f"Record deleted: {record_id}")
+        cur.execute(
+            """
+            DELETE FROM record_rollups
+            WHERE event_id = %s
+            """,
+            (event_id,),
+        )
+        if cur.rowcount:
+            ctx_logger.debug(f"Record rollups deleted: {cur.rowcount}")
+
+
+def list_record_partitions(conn: psycopg.Connection) -> list[str]:
+    with conn.cursor(row_factory=scalar_row) as cur:
+        cur.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'public.records'::regclass
+            ORDER BY c.relname
+            """
+        )
+        return cur.fetchall()
+
+
+def compact_records_before(horizon: date, conn: psycopg.Connection) -> tuple[int, int]:
+    """
+    Fold every monthly partition that ends on or before `horizon` into `record_rollups` and drop it.
+
+    Each partition is folded and dropped in its own committed transaction.
+    Returns the number of partitions and records compacted.
+    """
+    compacted_partitions = 0
+    compacted_records = 0
+    for partition in list_record_partitions(conn):
+        start = datetime.strptime(partition.removeprefix("records_p"), "%Y%m").date()
+        end = start + relativedelta(months=1)
+        if end > horizon:
+            break
+        with conn.cursor() as cur:
+            cur.execute(
+                sql.SQL(
+                    """
+                    INSERT INTO record_rollups (event_id, month, record_count, first_done_at, last_done_at)
+                    SELECT event_id, {}, COUNT(*), MIN(done_at), MAX(done_at)
+                    FROM {}
+                    GROUP BY event_id
+                    ON CONFLICT (event_id, month) DO UPDATE
+                    SET record_count = record_rollups.record_count + EXCLUDED.record_count,
+                        first_done_at = LEAST(record_rollups.first_done_at, EXCLUDED.first_done_at),
+                        last_done_at = GREATEST(record_rollups.last_done_at, EXCLUDED.last_done_at)
+                    """
+                ).format(sql.Literal(start), sql.Identifier(partition))
+            )
+            cur.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(partition)))
+            records = cur.fetchone()[0]
+            cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(partition)))
+        conn.commit()
+        _record_partitions.discard(partition)
+        compacted_partitions += 1
+        compacted_records += records
+        logger.debug(f"Record partition compacted: {partition} ({records} records)")
+    return compacted_partitions, compacted_records
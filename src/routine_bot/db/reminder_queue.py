@@ -0,0 +1,253 @@
+import logging
+from collections.abc import Iterator
+from datetime import date, time
+
+import psycopg
+from psycopg.rows import class_row, tuple_row
+
+from routine_bot.logger import add_context, format_logger_name
+from routine_bot.models import ReminderData
+from routine_bot.reminder_index import reminder_index
+
+logger = logging.getLogger(format_logger_name(__name__))
+
+# shared by both sender paths, so the feature flag never changes which reminders go out
+_DUE_REMINDER_FILTER = """
+            q.time_slot = %(time_slot)s
+            AND q.due_date <= %(today)s
+            AND e.reminder_enabled = TRUE
+            AND e.is_active = TRUE
+            AND u.is_active = TRUE
+"""
+
+
+def sync_event_reminders(event_id: str, conn: psycopg.Connection) -> None:
+    """
+    Rebuild the queue entries of one event for its owner and every recipient it is shared with.
+    """
+    sync_reminders_by_events([event_id], conn)
+
+
+def sync_reminders_by_events(event_ids: list[str], conn: psycopg.Connection) -> None:
+    """
+    Rebuild the queue entries of a set of events in two set-based statements.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM reminder_queue
+            WHERE event_id = ANY(%s::uuid[])
+            """,
+            (event_ids,),
+        )
+        cur.execute(
+            """
+            INSERT INTO reminder_queue (time_slot, due_date, recipient_id, event_id)
+            SELECT
+                u.time_slot,
+                e.next_due_at,
+                u.user_id,
+                e.event_id
+            FROM events e
+            CROSS JOIN LATERAL (
+                SELECT e.user_id AS recipient_id
+                UNION
+                SELECT s.recipient_id
+                FROM shares s
+                WHERE s.event_id = e.event_id
+            ) r
+            JOIN users u ON u.user_id = r.recipient_id
+            WHERE e.event_id = ANY(%s::uuid[])
+            AND e.reminder_enabled = TRUE
+            AND e.next_due_at IS NOT NULL
+            RETURNING event_id, time_slot, due_date, recipient_id
+            """,
+            (event_ids,),
+        )
+        rows = cur.fetchall()
+    entries_by_event = {event_id: [] for event_id in event_ids}
+    for event_id, time_slot, due_date, recipient_id in rows:
+        entries_by_event[event_id].append((time_slot, due_date, recipient_id))
+    for event_id, entries in entries_by_event.items():
+        reminder_index.set_event(event_id, entries)
+        ctx_logger = add_context(logger, event_id=event_id)
+        ctx_logger.debug(f"Reminder queue synced: {len(entries)} entries")
+
+
+def delete_recipient_reminder(event_id: str, recipient_id: str, conn: psycopg.Connection) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM reminder_queue
+            WHERE event_id = %s AND recipient_id = %s
+            """,
+            (event_id, recipient_id),
+        )
+    reminder_index.discard_recipient(event_id, recipient_id)
+    ctx_logger = add_context(logger, event_id=event_id)
+    ctx_logger.debug(f"Reminder dequeued for recipient: {recipient_id}")
+
+
+def set_recipient_time_slot(recipient_id: str, time_slot: time, conn: psycopg.Connection) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE reminder_queue
+            SET time_slot = %s
+            WHERE recipient_id = %s
+            """,
+            (time_slot, recipient_id),
+        )
+    reminder_index.move_recipient(recipient_id, time_slot)
+    ctx_logger = add_context(logger, user_id=recipient_id)
+    ctx_logger.debug(f"Set reminder queue time_slot={time_slot}")
+
+
+def rebuild_reminder_queue(conn: psycopg.Connection) -> None:
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE reminder_queue")
+        cur.execute(
+            """
+            INSERT INTO reminder_queue (time_slot, due_date, recipient_id, event_id)
+            SELECT
+                u.time_slot,
+                e.next_due_at,
+                u.user_id,
+                e.event_id
+            FROM events e
+            CROSS JOIN LATERAL (
+                SELECT e.user_id AS recipient_id
+                UNION
+                SELECT s.recipient_id
+                FROM shares s
+                WHERE s.event_id = e.event_id
+            ) r
+            JOIN users u ON u.user_id = r.recipient_id
+            WHERE e.reminder_enabled = TRUE
+            AND e.next_due_at IS NOT NULL
+            """
+        )
+        queued = cur.rowcount
+    logger.info(f"Reminder queue rebuilt: {queued} entries")
+    if reminder_index.loaded:
+        load_reminder_index(conn)
+
+
+def iter_due_reminders(
+    time_slot: time, today: date, conn: psycopg.Connection, batch_size: int = 500
+) -> Iterator[ReminderData]:
+    """
+    Stream every reminder due on or before `today` for the recipients of `time_slot`.
+
+    Rows come back in index order, i.e. grouped by due date rather than by recipient.
+    """
+    with conn.cursor(name="due_reminders", row_factory=class_row(ReminderData)) as cur:
+        cur.itersize = batch_size
+        cur.execute(
+            f"""
+            SELECT
+                q.recipient_id,
+                e.event_id,
+                e.user_id AS owner_id,
+                e.event_name,
+                e.event_cycle,
+                e.last_done_at,
+                e.next_due_at
+            FROM reminder_queue q
+            JOIN events e ON e.event_id = q.event_id
+            JOIN users u ON u.user_id = q.recipient_id
+            WHERE {_DUE_REMINDER_FILTER}
+            """,
+            {"time_slot": time_slot, "today": today},
+        )
+        yield from cur
+
+
+def iter_reminders_by_keys(
+    keys: list[tuple[str, str]], time_slot: time, today: date, conn: psycopg.Connection, batch_size: int = 500
+) -> Iterator[ReminderData]:
+    """
+    Stream the reminders for a work set of (recipient_id, event_id) pairs taken from the in-memory index.
+
+    The index is per-process and updated before commit, so the work set is only a list of candidates. Every pair
+    is checked again against `reminder_queue` and the event, so writes made by other processes or rolled back
+    since the index was updated never send a reminder that is no longer due.
+    """
+    recipient_ids = [recipient_id for recipient_id, _ in keys]
+    event_ids = [event_id for _, event_id in keys]
+    with conn.cursor(name="reminders_by_keys", row_factory=class_row(ReminderData)) as cur:
+        cur.itersize = batch_size
+        cur.execute(
+            f"""
+            SELECT
+                q.recipient_id,
+                e.event_id,
+                e.user_id AS owner_id,
+                e.event_name,
+                e.event_cycle,
+                e.last_done_at,
+                e.next_due_at
+            FROM unnest(%(recipient_ids)s::text[], %(event_ids)s::uuid[]) AS k(recipient_id, event_id)
+            JOIN reminder_queue q ON q.recipient_id = k.recipient_id AND q.event_id = k.event_id
+            JOIN events e ON e.event_id = q.event_id
+            JOIN users u ON u.user_id = q.recipient_id
+            WHERE {_DUE_REMINDER_FILTER}
+            """,
+            {"recipient_ids": recipient_ids, "event_ids": event_ids, "time_slot": time_slot, "today": today},
+        )
+        yield from cur
+
+
+def _iter_reminder_queue_entries(conn: psycopg.Connection, batch_size: int = 5000) -> Iterator[tuple]:
+    with conn.cursor(name="reminder_queue_entries", row_factory=tuple_row) as cur:
+        cur.itersize = batch_size
+        cur.execute(
+            """
+            SELECT time_slot, due_date, recipient_id, event_id
+            FROM reminder_queue
+            """
+        )
+        yield from cur
+
+
+def load_reminder_index(conn: psycopg.Connection) -> None:
+    reminder_index.load(_iter_reminder_queue_entries(conn))
+
+
+def refresh_reminder_index(conn: psycopg.Connection) -> None:
+    """
+    Reload the index entries marked stale by invalidations, or the whole index after the listener reconnected.
+    """
+    reload_needed, stale_events, stale_recipients = reminder_index.stale()
+    if reload_needed:
+        load_reminder_index(conn)
+        return
+    if not stale_events and not stale_recipients:
+        return
+    with conn.cursor(row_factory=tuple_row) as cur:
+        cur.execute(
+            """
+            SELECT time_slot, due_date, recipient_id, event_id
+            FROM reminder_queue
+            WHERE event_id = ANY(%s::uuid[]) OR recipient_id = ANY(%s)
+            """,
+            (list(stale_events), list(stale_recipients)),
+        )
+        entries = cur.fetchall()
+    reminder_index.refresh(stale_events, stale_recipients, entries)
+    logger.debug(f"Reminder index refreshed: {len(stale_events)} events, {len(stale_recipients)} recipients")
+
+
+def check_reminder_index(conn: psycopg.Connection) -> tuple[int, int]:
+    """
+    Compare the in-memory reminder index against `reminder_queue` and reload it if they drifted apart.
+
+    Returns the number of entries missing from the index and the number of stale entries it held.
+    """
+    missing, stale = reminder_index.diff(_iter_reminder_queue_entries(conn))
+    if missing or stale:
+        logger.warning(f"Reminder index drifted: {len(missing)} missing, {len(stale)} stale, reloading")
+        load_reminder_index(conn)
+    else:
+        logger.info(f"Reminder index consistent: {len(reminder_index)} entries")
+    return len(missing), len(stale)
@@ -1,8 +1,11 @@
 import logging
 
 import psycopg
+from psycopg.rows import class_row
 
+import routine_bot.db.reminder_queue as reminder_queue_db
 from routine_bot.errors import ShareNotFoundError
+from routine_bot.invalidation import invalidation_bus
 from routine_bot.logger import add_context, format_logger_name
 from routine_bot.models import EventData, ShareData
 
@@ -25,10 +28,14 @@ def add_share(share: ShareData, conn: psycopg.Connection) -> None:
             ),
         )
     logger.debug(f"Share inserted: {share.share_id}")
+    reminder_queue_db.sync_event_reminders(share.event_id, conn)
+    invalidation_bus.publish("user", share.recipient_id, conn)
+    # the event's share_count is maintained by a trigger
+    invalidation_bus.publish("event", share.event_id, conn)
 
 
 def get_share_by_event(event_id: str, recipient_id: str, conn: psycopg.Connection) -> ShareData | None:
-    with conn.cursor() as cur:
+    with conn.cursor(row_factory=class_row(ShareData)) as cur:
         cur.execute(
             """
             SELECT share_id, event_id, event_name, owner_id, recipient_id
@@ -37,14 +44,11 @@ def get_share_by_event(event_id: str, recipient_id: str, conn: psycopg.Connectio
             """,
             (event_id, recipient_id),
         )
-        result = cur.fetchone()
-        if result is None:
-            return None
-        return ShareData(*result)
+        return cur.fetchone()
 
 
 def list_shared_events_by_user(user_id: str, conn: psycopg.Connection) -> list[EventData]:
-    with conn.cursor() as cur:
+    with conn.cursor(row_factory=class_row(EventData)) as cur:
         cur.execute(
             """
             SELECT
@@ -67,38 +71,7 @@ def list_shared_events_by_user(user_id: str, conn: psycopg.Connection) -> list[E
             """,
             (user_id,),
         )
-        result = cur.fetchall()
-        return [EventData(*row) for row in result]
-
-
-def list_overdue_shared_events_by_user(user_id: str, conn: psycopg.Connection) -> list[EventData]:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT
-                e.event_id,
-                e.user_id,
-                e.event_name,
-                e.reminder_enabled,
-                e.event_cycle,
-                e.last_done_at,
-                e.next_due_at,
-                e.share_count,
-                e.is_active
-            FROM events e
-            WHERE e.reminder_enabled = TRUE
-            AND e.next_due_at <= NOW()
-            AND EXISTS (
-                SELECT 1
-                FROM shares s
-                WHERE s.recipient_id = %s
-                AND s.event_id = e.event_id
-            )
-            """,
-            (user_id,),
-        )
-        result = cur.fetchall()
-        return [EventData(*row) for row in result]
+        return cur.fetchall()
 
 
 def delete_share(event_id: str, recipient_id: str, conn: psycopg.Connection):
@@ -115,6 +88,10 @@ def delete_share(event_id: str, recipient_id: str, conn: psycopg.Connection):
         if result is None:
             raise ShareNotFoundError(f"Share not found: event_id={event_id}, recipient_id={recipient_id}")
     logger.debug(f"Share deleted: {result[0]}")
+    reminder_queue_db.delete_recipient_reminder(event_id, recipient_id, conn)
+    invalidation_bus.publish("user", recipient_id, conn)
+    # the event's share_count is maintained by a trigger
+    invalidation_bus.publish("event", event_id, conn)
 
 
 def delete_shares_by_event(event_id: str, conn: psycopg.Connection):
@@ -131,20 +108,23 @@ def delete_shares_by_event(event_id: str, conn: psycopg.Connection):
         deleted_shares = cur.fetchall()
         for share_id in deleted_shares:
             ctx_logger.debug(f"Share deleted: {share_id}")
+    reminder_queue_db.sync_event_reminders(event_id, conn)
+    invalidation_bus.publish("event", event_id, conn)
 
 
-def list_recipients_by_event(event_id: str, conn: psycopg.Connection) -> list[str]:
+def list_recipient_names_by_event(event_id: str, conn: psycopg.Connection) -> list[tuple[str, str | None]]:
     with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT recipient_id
-            FROM shares
-            WHERE event_id = %s
+            SELECT s.recipient_id, u.display_name
+            FROM shares s
+            LEFT JOIN users u ON u.user_id = s.recipient_id
+            WHERE s.event_id = %s
+            ORDER BY s.recipient_id
             """,
             (event_id,),
         )
-        result = cur.fetchall()
-        return [row[0] for row in result]
+        return cur.fetchall()
 
 
 def is_share_duplicated(event_id: str, recipient_id: str, conn: psycopg.Connection) -> bool:
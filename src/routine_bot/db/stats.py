@@ -0,0 +1,172 @@
+import logging
+from datetime import date
+
+import psycopg
+from psycopg.rows import class_row
+
+from routine_bot.logger import add_context, format_logger_name
+from routine_bot.models import EventStatsData
+
+logger = logging.getLogger(format_logger_name(__name__))
+
+
+def update_event_stats(event_id: str, event_cycle: str | None, done_at: date, conn: psycopg.Connection) -> None:
+    """
+    Fold one new completion into the event's running statistics.
+
+    A completion is on time when it lands within one `event_cycle` of the previous one, and the current streak
+    counts the consecutive on-time completions. Completions dated on or before the latest known one (same-day
+    repeats and backfills) only add to the completion count, so the update never has to look at `records`.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO event_stats AS s (
+                event_id,
+                completion_count,
+                last_done_at,
+                interval_count,
+                interval_days_sum,
+                on_time_count,
+                current_streak,
+                longest_streak
+            )
+            VALUES (%(event_id)s, 1, %(done_at)s, 0, 0, 0, 1, 1)
+            ON CONFLICT (event_id) DO UPDATE
+            SET completion_count = s.completion_count + 1,
+                last_done_at = GREATEST(s.last_done_at, EXCLUDED.last_done_at),
+                interval_count = s.interval_count + (EXCLUDED.last_done_at > s.last_done_at)::int,
+                interval_days_sum = s.interval_days_sum + CASE
+                    WHEN EXCLUDED.last_done_at > s.last_done_at
+                    THEN EXCLUDED.last_done_at - s.last_done_at
+                    ELSE 0
+                END,
+                on_time_count = s.on_time_count + COALESCE(
+                    EXCLUDED.last_done_at > s.last_done_at
+                    AND EXCLUDED.last_done_at <= s.last_done_at + %(event_cycle)s::interval,
+                    FALSE
+                )::int,
+                current_streak = CASE
+                    WHEN EXCLUDED.last_done_at <= s.last_done_at THEN s.current_streak
+                    WHEN EXCLUDED.last_done_at <= s.last_done_at + %(event_cycle)s::interval THEN s.current_streak + 1
+                    ELSE 1
+                END,
+                longest_streak = GREATEST(
+                    s.longest_streak,
+                    CASE
+                        WHEN EXCLUDED.last_done_at <= s.last_done_at THEN s.current_streak
+                        WHEN EXCLUDED.last_done_at <= s.last_done_at + %(event_cycle)s::interval
+                        THEN s.current_streak + 1
+                        ELSE 1
+                    END
+                )
+            RETURNING completion_count, current_streak
+            """,
+            {"event_id": event_id, "event_cycle": event_cycle, "done_at": done_at},
+        )
+        completion_count, current_streak = cur.fetchone()
+    ctx_logger = add_context(logger, event_id=event_id)
+    ctx_logger.debug(f"Set completion_count={completion_count}, current_streak={current_streak}")
+
+
+def rebuild_event_stats(conn: psycopg.Connection) -> None:
+    """
+    Recompute `event_stats` from scratch out of the remaining raw records.
+
+    Months already compacted into `record_rollups` only contribute to the completion count.
+    """
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE event_stats")
+        cur.execute(
+            """
+            WITH completions AS (
+                SELECT
+                    r.event_id,
+                    r.done_at,
+                    LAG(r.done_at) OVER (PARTITION BY r.event_id ORDER BY r.done_at) AS prev_done_at,
+                    e.event_cycle
+                FROM (SELECT DISTINCT event_id, done_at FROM records) r
+                JOIN events e ON e.event_id = r.event_id
+            ),
+            flagged AS (
+                SELECT
+                    *,
+                    COALESCE(done_at <= prev_done_at + event_cycle::interval, FALSE) AS on_time
+                FROM completions
+            ),
+            grouped AS (
+                SELECT
+                    *,
+                    SUM((NOT on_time)::int) OVER (PARTITION BY event_id ORDER BY done_at) AS streak_group
+                FROM flagged
+            ),
+            streaks AS (
+                SELECT
+                    event_id,
+                    COUNT(*) AS streak_length,
+                    ROW_NUMBER() OVER (PARTITION BY event_id ORDER BY MAX(done_at) DESC) AS recency
+                FROM grouped
+                GROUP BY event_id, streak_group
+            )
+            INSERT INTO event_stats (
+                event_id,
+                completion_count,
+                last_done_at,
+                interval_count,
+                interval_days_sum,
+                on_time_count,
+                current_streak,
+                longest_streak
+            )
+            SELECT
+                g.event_id,
+                (SELECT COUNT(*) FROM records r WHERE r.event_id = g.event_id)
+                + (SELECT COALESCE(SUM(rr.record_count), 0) FROM record_rollups rr WHERE rr.event_id = g.event_id),
+                MAX(g.done_at),
+                COUNT(g.prev_done_at),
+                COALESCE(SUM(g.done_at - g.prev_done_at), 0),
+                SUM(g.on_time::int),
+                (SELECT s.streak_length FROM streaks s WHERE s.event_id = g.event_id AND s.recency = 1),
+                (SELECT MAX(s.streak_length) FROM streaks s WHERE s.event_id = g.event_id)
+            FROM grouped g
+            GROUP BY g.event_id
+            """
+        )
+        rebuilt = cur.rowcount
+    logger.info(f"Event stats rebuilt: {rebuilt} events")
+
+
+def list_event_stats_by_user(user_id: str, conn: psycopg.Connection) -> list[EventStatsData]:
+    """
+    Read the statistics of every event the user owns, one precomputed row per event.
+
+    The current streak reads as 0 once the next on-time date has passed without a completion.
+    """
+    with conn.cursor(row_factory=class_row(EventStatsData)) as cur:
+        cur.execute(
+            """
+            SELECT
+                e.event_id,
+                e.event_name,
+                e.event_cycle,
+                COALESCE(s.completion_count, 0) AS completion_count,
+                COALESCE(s.interval_count, 0) AS interval_count,
+                COALESCE(s.interval_days_sum, 0) AS interval_days_sum,
+                COALESCE(s.on_time_count, 0) AS on_time_count,
+                CASE
+                    WHEN s.event_id IS NULL THEN 0
+                    WHEN e.event_cycle IS NOT NULL
+                    AND s.last_done_at + e.event_cycle::interval
+                        < (NOW() AT TIME ZONE 'Asia/Taipei')::date
+                    THEN 0
+                    ELSE s.current_streak
+                END AS current_streak,
+                COALESCE(s.longest_streak, 0) AS longest_streak
+            FROM events e
+            LEFT JOIN event_stats s ON s.event_id = e.event_id
+            WHERE e.user_id = %s
+            ORDER BY e.last_done_at DESC
+            """,
+            (user_id,),
+        )
+        return cur.fetchall()
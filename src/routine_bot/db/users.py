@@ -1,9 +1,14 @@
 import logging
+from collections.abc import Iterator
 from datetime import time
 
 import psycopg
+from psycopg.rows import class_row, scalar_row
 
+import routine_bot.db.reminder_queue as reminder_queue_db
 from routine_bot.errors import UserNotFoundError
+from routine_bot.identity_map import current_identity_map
+from routine_bot.invalidation import invalidation_bus
 from routine_bot.logger import add_context, format_logger_name
 from routine_bot.models import UserData
 
@@ -23,13 +28,16 @@ def add_user(user_id: str, conn: psycopg.Connection) -> None:
 
 
 def get_user(user_id: str, conn: psycopg.Connection) -> UserData | None:
-    with conn.cursor() as cur:
+    identity_map = current_identity_map()
+    if identity_map is not None and (user := identity_map.get_user(user_id)) is not None:
+        return user
+    with conn.cursor(row_factory=class_row(UserData)) as cur:
         cur.execute(
             """
             SELECT
                 user_id,
                 event_count,
-                time_slot,
+                time_slot AS notification_slot,
                 is_premium,
                 premium_until,
                 is_active
@@ -38,10 +46,10 @@ def get_user(user_id: str, conn: psycopg.Connection) -> UserData | None:
             """,
             (user_id,),
         )
-        result = cur.fetchone()
-        if result is None:
-            return None
-        return UserData(*result)
+        user = cur.fetchone()
+    if identity_map is not None and user is not None:
+        identity_map.add_user(user)
+    return user
 
 
 def user_exists(user_id: str, conn: psycopg.Connection) -> bool:
@@ -58,16 +66,24 @@ def user_exists(user_id: str, conn: psycopg.Connection) -> bool:
         return cur.fetchone() is not None
 
 
-def list_active_users_by_time_slot(time_slot: time, conn: psycopg.Connection) -> list[UserData]:
+def iter_active_users_by_time_slot(
+    time_slot: time, conn: psycopg.Connection, batch_size: int = 500
+) -> Iterator[UserData]:
+    """
+    Stream the active users of a time slot through a server-side cursor, `batch_size` rows per round trip.
+
+    The cursor lives in the current transaction, so the caller must not commit before the iterator is exhausted.
+    """
     if time_slot.minute or time_slot.second or time_slot.microsecond:
         raise ValueError(f"Not a valid time slot: {time_slot}")
-    with conn.cursor() as cur:
+    with conn.cursor(name="active_users_by_time_slot", row_factory=class_row(UserData)) as cur:
+        cur.itersize = batch_size
         cur.execute(
             """
             SELECT
                 user_id,
                 event_count,
-                time_slot,
+                time_slot AS notification_slot,
                 is_premium,
                 premium_until,
                 is_active
@@ -76,58 +92,125 @@ def list_active_users_by_time_slot(time_slot: time, conn: psycopg.Connection) ->
             """,
             (time_slot,),
         )
-        result = cur.fetchall()
-        return [UserData(*row) for row in result]
+        yield from cur
+
+
+def reconcile_user_event_counts(conn: psycopg.Connection, batch_size: int = 1000) -> list[tuple[str, int, int]]:
+    """
+    Recompute `event_count` from the events table and correct the users whose counter drifted.
+
+    Users are walked in `user_id` order and each batch is committed on its own. A batch is locked before its
+    events are counted, in a separate statement, so the count sees every event whose trigger got the lock first,
+    and events added later wait for the commit and increment the corrected value. Returns the corrected
+    (user_id, old count, new count) entries.
+    """
+    corrected = []
+    after = ""
+    while True:
+        with conn.cursor(row_factory=scalar_row) as cur:
+            cur.execute(
+                """
+                SELECT user_id
+                FROM users
+                WHERE user_id > %s
+                ORDER BY user_id
+                LIMIT %s
+                FOR UPDATE
+                """,
+                (after, batch_size),
+            )
+            user_ids = cur.fetchall()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE users u
+                SET event_count = a.event_count
+                FROM (
+                    SELECT b.user_id, COUNT(e.event_id) AS event_count
+                    FROM unnest(%s::text[]) AS b(user_id)
+                    LEFT JOIN events e ON e.user_id = b.user_id
+                    GROUP BY b.user_id
+                ) a, users old
+                WHERE u.user_id = a.user_id
+                AND old.user_id = a.user_id
+                AND u.event_count <> a.event_count
+                RETURNING u.user_id, old.event_count AS old_count, u.event_count AS new_count
+                """,
+                (user_ids,),
+            )
+            rows = cur.fetchall()
+        conn.commit()
+        for user_id, old_count, new_count in rows:
+            ctx_logger = add_context(logger, user_id=user_id)
+            ctx_logger.debug(f"Set event_count={new_count} (was {old_count})")
+            corrected.append((user_id, old_count, new_count))
+        if len(user_ids) < batch_size:
+            break
+        after = user_ids[-1]
+    return corrected
 
 
-def increment_user_event_count(user_id: str, by: int, conn: psycopg.Connection) -> None:
+def set_user_activeness(user_id: str, to: bool, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
             UPDATE users
-            SET event_count = event_count + %s
+            SET is_active = %s
             WHERE user_id = %s
-            RETURNING event_count
             """,
-            (by, user_id),
+            (to, user_id),
         )
-        result = cur.fetchone()
-        if result is None:
+        if cur.rowcount == 0:
             raise UserNotFoundError(f"User not found: {user_id}")
     ctx_logger = add_context(logger, user_id=user_id)
-    ctx_logger.debug(f"Set event_count={result[0]}")
+    ctx_logger.debug(f"Set is_active={to}")
+    invalidation_bus.publish("user", user_id, conn)
 
 
-def set_user_activeness(user_id: str, to: bool, conn: psycopg.Connection) -> None:
+def set_user_time_slot(user_id: str, time_slot: time, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
             UPDATE users
-            SET is_active = %s
+            SET time_slot = %s
             WHERE user_id = %s
             """,
-            (to, user_id),
+            (time_slot, user_id),
         )
         if cur.rowcount == 0:
             raise UserNotFoundError(f"User not found: {user_id}")
     ctx_logger = add_context(logger, user_id=user_id)
-    ctx_logger.debug(f"Set is_active={to}")
+    ctx_logger.debug(f"Set time_slot={time_slot}")
+    invalidation_bus.publish("user", user_id, conn)
+    reminder_queue_db.set_recipient_time_slot(user_id, time_slot, conn)
 
 
-def set_user_time_slot(user_id: str, time_slot: time, conn: psycopg.Connection) -> None:
+def set_user_display_name(user_id: str, display_name: str, conn: psycopg.Connection) -> None:
     with conn.cursor() as cur:
         cur.execute(
             """
             UPDATE users
-            SET time_slot = %s
+            SET display_name = %s
             WHERE user_id = %s
             """,
-            (time_slot, user_id),
+            (display_name, user_id),
         )
         if cur.rowcount == 0:
             raise UserNotFoundError(f"User not found: {user_id}")
+        # recipients' cached summaries carry the name as the owner of the events shared with them
+        cur.execute(
+            """
+            SELECT event_id
+            FROM events
+            WHERE user_id = %s AND share_count > 0
+            """,
+            (user_id,),
+        )
+        shared_event_ids = [row[0] for row in cur.fetchall()]
     ctx_logger = add_context(logger, user_id=user_id)
-    ctx_logger.debug(f"Set time_slot={time_slot}")
+    ctx_logger.debug(f"Set display_name={display_name}")
+    invalidation_bus.publish("user", user_id, conn)
+    invalidation_bus.publish_many("event", shared_event_ids, conn)
 
 
 def is_user_limited(user_id: str, conn: psycopg.Connection) -> bool:
@@ -17,3 +17,9 @@ class ChatStatus(StrEnum):
     ONGOING = auto()
     COMPLETED = auto()
     ABORTED = auto()
+
+
+class ChatInput(StrEnum):
+    TEXT = auto()
+    POSTBACK = auto()
+    PICKED_EVENT = auto()
@@ -6,6 +6,7 @@ class Command(StrEnum):
     FIND = "/find"
     DELETE = "/delete"
     VIEW_ALL = "/viewall"
+    STATS = "/stats"
     DONE = "/done"
     EDIT = "/edit"
     SHARE = "/share"
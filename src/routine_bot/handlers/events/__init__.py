@@ -1,19 +1,11 @@
 from .delete import create_delete_event_chat as create_delete_event_chat
-from .delete import handle_delete_event_chat as handle_delete_event_chat
 from .done import create_done_event_chat as create_done_event_chat
-from .done import handle_done_event_chat as handle_done_event_chat
-from .done import process_selected_done_date as process_selected_done_date
 from .edit import create_edit_event_chat as create_edit_event_chat
-from .edit import handle_edit_event_chat as handle_edit_event_chat
 from .find import create_find_event_chat as create_find_event_chat
-from .find import handle_find_event_chat as handle_find_event_chat
 from .new import create_new_event_chat as create_new_event_chat
-from .new import handle_new_event_chat as handle_new_event_chat
-from .new import process_selected_start_date as process_selected_start_date
+from .picker import build_event_picker as build_event_picker
 from .receive import create_receive_event_chat as create_receive_event_chat
-from .receive import handle_receive_event_chat as handle_receive_event_chat
 from .revoke import create_revoke_event_chat as create_revoke_event_chat
-from .revoke import handle_revoke_event_chat as handle_revoke_event_chat
 from .share import create_share_event_chat as create_share_event_chat
-from .share import handle_share_event_chat as handle_share_event_chat
+from .stats import handle_stats_chat as handle_stats_chat
 from .view_all import handle_view_all_chat as handle_view_all_chat
@@ -1,5 +1,4 @@
 import logging
-import uuid
 
 import psycopg
 from linebot.v3.messaging import FlexMessage, TemplateMessage
@@ -8,16 +7,15 @@ import routine_bot.db.chats as chat_db
 import routine_bot.db.events as event_db
 import routine_bot.db.records as record_db
 import routine_bot.db.shares as share_db
-import routine_bot.db.users as user_db
 import routine_bot.messages as msg
-from routine_bot.constants import TZ_TAIPEI
 from routine_bot.enums.chat import ChatStatus, ChatType
 from routine_bot.enums.options import ConfirmDeletionOptions
 from routine_bot.enums.steps import DeleteEventSteps
-from routine_bot.errors import InvalidStepError
+from routine_bot.handlers.events.picker import build_event_picker
+from routine_bot.handlers.state_machine import Step, chat_machine
 from routine_bot.logger import add_context, format_logger_name, indent, shorten_uuid
-from routine_bot.models import ChatData
-from routine_bot.utils import validate_event_name
+from routine_bot.models import ChatData, EventData
+from routine_bot.utils import uuid7, validate_event_name
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -36,24 +34,28 @@ def _process_event_name(text: str, chat: ChatData, conn: psycopg.Connection) ->
     event = event_db.get_event_by_name(user_id, event_name, conn)
     if event is None:
         cxt_logger.debug("Event not found: user_id=%s, event_name=%r", user_id, event_name)
-        return msg.error.event_name_not_found(event_name)
+        suggestions = event_db.list_similar_event_names(user_id, event_name, conn)
+        return msg.error.event_name_not_found(event_name, suggestions)
+    return _process_selected_event(event, chat, conn)
 
+
+def _process_selected_event(event: EventData, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage:
+    cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.info("Event selected for deletion: %r (%s)", event.event_name, shorten_uuid(event.event_id))
-    chat_db.set_chat_current_step(chat.chat_id, DeleteEventSteps.CONFIRM_DELETION.value, conn)
+    chat_machine.advance(
+        chat,
+        DeleteEventSteps.CONFIRM_DELETION.value,
+        conn,
+        new_data={"event_id": event.event_id, "event_name": event.event_name},
+    )
 
-    payload_new_data = {
-        "event_id": event.event_id,
-        "event_name": event.event_name,
-        "last_done_at": event.last_done_at.astimezone(TZ_TAIPEI).strftime("%Y-%m-%d"),
-    }
+    render_data = {"last_done_at": event.last_done_at.strftime("%Y-%m-%d")}
     if event.reminder_enabled and event.next_due_at:
-        payload_new_data["reminder_enabled"] = "True"
-        payload_new_data["next_due_at"] = event.next_due_at.astimezone(TZ_TAIPEI).strftime("%Y-%m-%d")
+        render_data["reminder_enabled"] = "True"
+        render_data["next_due_at"] = event.next_due_at.strftime("%Y-%m-%d")
     else:
-        payload_new_data["reminder_enabled"] = "False"
-
-    chat.payload = chat_db.patch_chat_payload(chat=chat, new_data=payload_new_data, conn=conn, logger=logger)
-    return msg.events.delete.comfirm_event_deletion(chat.payload)
+        render_data["reminder_enabled"] = "False"
+    return msg.events.delete.comfirm_event_deletion(chat.render_context(**render_data))
 
 
 def _confirm_deletion(chat: ChatData, conn: psycopg.Connection):
@@ -65,8 +67,7 @@ def _confirm_deletion(chat: ChatData, conn: psycopg.Connection):
     share_db.delete_shares_by_event(event.event_id, conn)
     record_db.delete_records_by_event(event.event_id, conn)
     event_db.delete_event(event.event_id, conn)
-    user_db.increment_user_event_count(event.user_id, -1, conn)
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
 
     summary = "\n".join(
         [
@@ -84,18 +85,20 @@ def _confirm_deletion(chat: ChatData, conn: psycopg.Connection):
 def _cancel_deletion(chat: ChatData, conn: psycopg.Connection):
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.info("Deletion cancelled")
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
     return msg.events.delete.cancelled(chat.payload)
 
 
+_CONFIRM_DELETION_HANDLERS = {
+    ConfirmDeletionOptions.CANCEL.value: _cancel_deletion,
+    ConfirmDeletionOptions.DELETE.value: _confirm_deletion,
+}
+
+
 def _process_confirm_deletion(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.debug("Processing confirm deletion")
-    handlers = {
-        ConfirmDeletionOptions.CANCEL.value: _cancel_deletion,
-        ConfirmDeletionOptions.DELETE.value: _confirm_deletion,
-    }
-    handler = handlers.get(text)
+    handler = _CONFIRM_DELETION_HANDLERS.get(text)
     if handler:
         return handler(chat, conn)
     cxt_logger.debug("Invalid entry: %r", text)
@@ -103,7 +106,7 @@ def _process_confirm_deletion(text: str, chat: ChatData, conn: psycopg.Connectio
 
 
 def create_delete_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessage:
-    chat_id = str(uuid.uuid4())
+    chat_id = str(uuid7())
     cxt_logger = add_context(logger, chat_id=chat_id)
     cxt_logger.info("New chat created: user=%s, chat_type=delete_event", shorten_uuid(user_id))
     chat = ChatData(
@@ -115,18 +118,17 @@ def create_delete_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMess
         status=ChatStatus.ONGOING.value,
     )
     chat_db.add_chat(chat, conn)
-    return msg.events.delete.enter_event_name()
-
-
-def handle_delete_event_chat(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
-    cxt_logger = add_context(logger, chat_id=chat.chat_id)
-    cxt_logger.debug("Routing delete event chat: step=%s, text=%r", chat.current_step, text)
-    handlers = {
-        DeleteEventSteps.ENTER_NAME.value: _process_event_name,
-        DeleteEventSteps.CONFIRM_DELETION.value: _process_confirm_deletion,
-    }
-    handler = handlers.get(chat.current_step)
-    if handler:
-        return handler(text, chat, conn)
-    else:
-        raise InvalidStepError(f"Invalid step in handle_delete_event_chat: {chat.current_step}")
+    return msg.events.delete.enter_event_name(build_event_picker(chat, conn))
+
+
+chat_machine.register(
+    ChatType.DELETE_EVENT.value,
+    {
+        DeleteEventSteps.ENTER_NAME.value: Step(
+            text=_process_event_name,
+            picked_event=_process_selected_event,
+            to=(DeleteEventSteps.CONFIRM_DELETION.value,),
+        ),
+        DeleteEventSteps.CONFIRM_DELETION.value: Step(text=_process_confirm_deletion),
+    },
+)
@@ -1,9 +1,6 @@
 import logging
-import uuid
-from datetime import UTC
 
 import psycopg
-from dateutil.relativedelta import relativedelta
 from linebot.v3.messaging import TemplateMessage
 from linebot.v3.messaging.models.flex_message import FlexMessage
 
@@ -13,11 +10,11 @@ from routine_bot.db import events as event_db
 from routine_bot.enums.chat import ChatStatus, ChatType
 from routine_bot.enums.options import EditEventOptions, ToggleReminderOptions
 from routine_bot.enums.steps import EditEventSteps
-from routine_bot.enums.units import CycleUnit
-from routine_bot.errors import InvalidStepError
+from routine_bot.handlers.events.picker import build_event_picker
+from routine_bot.handlers.state_machine import Step, chat_machine
 from routine_bot.logger import add_context, format_logger_name, indent, shorten_uuid
-from routine_bot.models import ChatData
-from routine_bot.utils import parse_event_cycle, validate_event_name
+from routine_bot.models import ChatData, EventData
+from routine_bot.utils import parse_event_cycle, uuid7, validate_event_name
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -34,32 +31,35 @@ def _process_event_name(text: str, chat: ChatData, conn: psycopg.Connection) ->
     event = event_db.get_event_by_name(user_id, event_name, conn)
     if event is None:
         cxt_logger.debug("Event not found: user_id=%s, event_name=%r", user_id, event_name)
-        return msg.error.event_name_not_found(event_name)
+        suggestions = event_db.list_similar_event_names(user_id, event_name, conn)
+        return msg.error.event_name_not_found(event_name, suggestions)
+    return _process_selected_event(event, chat, conn)
 
-    cxt_logger.info("Event selected: %r (%s)", event_name, shorten_uuid(event.event_id))
-    chat_db.set_chat_current_step(chat.chat_id, EditEventSteps.SELECT_OPTION.value, conn)
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat,
+
+def _process_selected_event(event: EventData, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage:
+    cxt_logger = add_context(logger, chat_id=chat.chat_id)
+    cxt_logger.info("Event selected: %r (%s)", event.event_name, shorten_uuid(event.event_id))
+    chat_machine.advance(
+        chat,
+        EditEventSteps.SELECT_OPTION.value,
+        conn,
         new_data={
-            "event_name": event_name,
+            "event_name": event.event_name,
             "event_id": event.event_id,
-            "last_done_at": event.last_done_at.isoformat(),
             "reminder_enabled": str(event.reminder_enabled),
             "event_cycle": event.event_cycle if event.event_cycle else "None",
         },
-        conn=conn,
-        logger=logger,
     )
     return msg.events.edit.select_option(chat.payload)
 
 
 def _prepare_new_event_name(chat: ChatData, conn: psycopg.Connection) -> FlexMessage:
-    chat_db.set_chat_current_step(chat.chat_id, EditEventSteps.ENTER_NEW_NAME.value, conn)
+    chat_machine.advance(chat, EditEventSteps.ENTER_NEW_NAME.value, conn)
     return msg.events.edit.enter_new_event_name(chat.payload)
 
 
 def _prepare_toggle_reminder(chat: ChatData, conn: psycopg.Connection) -> TemplateMessage:
-    chat_db.set_chat_current_step(chat.chat_id, EditEventSteps.TOGGLE_REMINDER.value, conn)
+    chat_machine.advance(chat, EditEventSteps.TOGGLE_REMINDER.value, conn)
     return msg.events.edit.toggle_reminder(chat.payload)
 
 
@@ -68,19 +68,21 @@ def _prepare_new_event_cycle(chat: ChatData, conn: psycopg.Connection) -> Templa
         cxt_logger = add_context(logger, chat_id=chat.chat_id)
         cxt_logger.debug("Cannot edit event cycle if reminder is disabled")
         return msg.events.edit.event_cycle_requires_reminder_enabled(chat.payload)
-    chat_db.set_chat_current_step(chat.chat_id, EditEventSteps.ENTER_NEW_EVENT_CYCLE.value, conn)
+    chat_machine.advance(chat, EditEventSteps.ENTER_NEW_EVENT_CYCLE.value, conn)
     return msg.events.edit.enter_new_event_cycle(chat.payload)
 
 
+_EDIT_OPTION_HANDLERS = {
+    EditEventOptions.NAME.value: _prepare_new_event_name,
+    EditEventOptions.REMINDER.value: _prepare_toggle_reminder,
+    EditEventOptions.EVENT_CYCLE.value: _prepare_new_event_cycle,
+}
+
+
 def _process_selected_edit_option(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.debug("Processing selected edit option")
-    handlers = {
-        EditEventOptions.NAME.value: _prepare_new_event_name,
-        EditEventOptions.REMINDER.value: _prepare_toggle_reminder,
-        EditEventOptions.EVENT_CYCLE.value: _prepare_new_event_cycle,
-    }
-    handler = handlers.get(text)
+    handler = _EDIT_OPTION_HANDLERS.get(text)
     if handler:
         cxt_logger.debug("Option selected: %r", text)
         return handler(chat, conn)
@@ -104,10 +106,7 @@ def _process_new_event_name(text: str, chat: ChatData, conn: psycopg.Connection)
     event = event_db.get_event_by_id(event_id, conn)
     event_db.set_event_name(event.event_id, new_event_name, conn)
     cxt_logger.info("Event name set to %r", new_event_name)
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat, new_data={"new_event_name": new_event_name}, conn=conn, logger=logger
-    )
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
 
     summary = "\n".join(
         [
@@ -121,13 +120,13 @@ def _process_new_event_name(text: str, chat: ChatData, conn: psycopg.Connection)
         ]
     )
     cxt_logger.info("Event modified successfully\n%s", indent(summary))
-    return msg.events.edit.edit_event_name_succeeded(chat.payload)
+    return msg.events.edit.edit_event_name_succeeded(chat.render_context(new_event_name=new_event_name))
 
 
 def _cancel_toggle_reminder(chat: ChatData, conn: psycopg.Connection) -> FlexMessage:
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.debug("Cancelled toggling reminder")
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
     return msg.events.edit.toggle_reminder_cancelled(chat.payload)
 
 
@@ -139,9 +138,11 @@ def _confirm_toggle_reminder(chat: ChatData, conn: psycopg.Connection) -> Templa
 
     if new_reminder_flag and chat.payload["event_cycle"] == "None":
         cxt_logger.info("Event cycle is missing, proceed to set event cycle")
-        chat_db.set_chat_current_step(chat.chat_id, EditEventSteps.ENTER_NEW_EVENT_CYCLE.value, conn)
-        chat.payload = chat_db.patch_chat_payload(
-            chat=chat, new_data={"proceed_from_toggle_reminder": str(True)}, conn=conn, logger=logger
+        chat_machine.advance(
+            chat,
+            EditEventSteps.ENTER_NEW_EVENT_CYCLE.value,
+            conn,
+            new_data={"proceed_from_toggle_reminder": str(True)},
         )
         return msg.events.edit.proceed_to_set_event_cycle(chat.payload)
 
@@ -149,7 +150,7 @@ def _confirm_toggle_reminder(chat: ChatData, conn: psycopg.Connection) -> Templa
     event = event_db.get_event_by_id(event_id, conn)
     event_db.set_event_reminder_enabled(event.event_id, new_reminder_flag, conn)
     cxt_logger.info(f"Reminder {'enabled' if new_reminder_flag else 'disabled'}")
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
 
     summary = "\n".join(
         [
@@ -164,17 +165,22 @@ def _confirm_toggle_reminder(chat: ChatData, conn: psycopg.Connection) -> Templa
         ]
     )
     cxt_logger.info("Event modified successfully\n%s", indent(summary))
-    return msg.events.edit.toggle_reminder_succeeded(chat.payload)
+    render_data = {}
+    if new_reminder_flag and event.next_due_at is not None:
+        render_data["next_due_at"] = event.next_due_at.isoformat()
+    return msg.events.edit.toggle_reminder_succeeded(chat.render_context(**render_data))
+
+
+_TOGGLE_REMINDER_HANDLERS = {
+    ToggleReminderOptions.CANCEL.value: _cancel_toggle_reminder,
+    ToggleReminderOptions.CONFIRM.value: _confirm_toggle_reminder,
+}
 
 
 def _process_toggle_reminder(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.debug("Processing toggle reminder")
-    handlers = {
-        ToggleReminderOptions.CANCEL.value: _cancel_toggle_reminder,
-        ToggleReminderOptions.CONFIRM.value: _confirm_toggle_reminder,
-    }
-    handler = handlers.get(text)
+    handler = _TOGGLE_REMINDER_HANDLERS.get(text)
     if handler:
         return handler(chat, conn)
     cxt_logger.debug("Invalid entry: %r", text)
@@ -198,28 +204,14 @@ def _process_new_event_cycle(text: str, chat: ChatData, conn: psycopg.Connection
     event_id = chat.payload["event_id"]
     event = event_db.get_event_by_id(event_id, conn)
     last_done_at = event.last_done_at
-    offset = relativedelta()
-    if unit == CycleUnit.DAY:
-        offset = relativedelta(days=+increment)
-    elif unit == CycleUnit.WEEK:
-        offset = relativedelta(weeks=+increment)
-    elif unit == CycleUnit.MONTH:
-        offset = relativedelta(months=+increment)
-    next_due_at = last_done_at + offset
     new_event_cycle = f"{increment} {unit}"
 
     if chat.payload.get("proceed_from_toggle_reminder"):
         event_db.set_event_reminder_enabled(event_id, True, conn)
-    event_db.set_event_cycle(event_id, new_event_cycle, conn)
-    event_db.set_event_next_due_at(event_id, next_due_at, conn)
+    event_db.set_event_cycle(event_id, increment, unit, conn)
+    next_due_at = event_db.recompute_next_due_at([event_id], conn)[event_id]
     cxt_logger.info("Event cycle set to %s", new_event_cycle)
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat,
-        new_data={"new_event_cycle": new_event_cycle, "next_due_at": next_due_at.isoformat()},
-        conn=conn,
-        logger=logger,
-    )
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
 
     summary = "\n".join(
         [
@@ -229,19 +221,22 @@ def _process_new_event_cycle(text: str, chat: ChatData, conn: psycopg.Connection
             f"│ User: {chat.user_id}",
             "│ Change: Event Cycle",
             f"│ Details: {event.event_cycle or 'None'} → {new_event_cycle}",
-            f"│ Last Done: {last_done_at.astimezone(UTC)}",
-            f"│ Next Due: {next_due_at.astimezone(UTC)}",
+            f"│ Last Done: {last_done_at}",
+            f"│ Next Due: {next_due_at}",
             "└───────────────────────────────────────────",
         ]
     )
     cxt_logger.info("Event modified successfully\n%s", indent(summary))
+    context = chat.render_context(
+        new_event_cycle=new_event_cycle, next_due_at=next_due_at.isoformat(), last_done_at=last_done_at.isoformat()
+    )
     if chat.payload.get("proceed_from_toggle_reminder"):
-        return msg.events.edit.toggle_reminder_succeeded(chat.payload)
-    return msg.events.edit.edit_event_cycle_succeeded(chat.payload)
+        return msg.events.edit.toggle_reminder_succeeded(context)
+    return msg.events.edit.edit_event_cycle_succeeded(context)
 
 
 def create_edit_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessage:
-    chat_id = str(uuid.uuid4())
+    chat_id = str(uuid7())
     cxt_logger = add_context(logger, chat_id=chat_id)
     cxt_logger.info("New chat created: user=%s, chat_type=edit_event", shorten_uuid(user_id))
     chat = ChatData(
@@ -253,20 +248,29 @@ def create_edit_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessag
         status=ChatStatus.ONGOING.value,
     )
     chat_db.add_chat(chat, conn)
-    return msg.events.edit.enter_event_name()
-
-
-def handle_edit_event_chat(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
-    cxt_logger = add_context(logger, chat_id=chat.chat_id)
-    cxt_logger.debug("Routing edit event chat: step=%s, text=%r", chat.current_step, text)
-    handlers = {
-        EditEventSteps.ENTER_NAME.value: _process_event_name,
-        EditEventSteps.SELECT_OPTION.value: _process_selected_edit_option,
-        EditEventSteps.ENTER_NEW_NAME.value: _process_new_event_name,
-        EditEventSteps.TOGGLE_REMINDER.value: _process_toggle_reminder,
-        EditEventSteps.ENTER_NEW_EVENT_CYCLE.value: _process_new_event_cycle,
-    }
-    handler = handlers.get(chat.current_step)
-    if handler:
-        return handler(text, chat, conn)
-    raise InvalidStepError(f"Invalid step in handle_edit_event_chat: {chat.current_step}")
+    return msg.events.edit.enter_event_name(build_event_picker(chat, conn))
+
+
+chat_machine.register(
+    ChatType.EDIT_EVENT.value,
+    {
+        EditEventSteps.ENTER_NAME.value: Step(
+            text=_process_event_name,
+            picked_event=_process_selected_event,
+            to=(EditEventSteps.SELECT_OPTION.value,),
+        ),
+        EditEventSteps.SELECT_OPTION.value: Step(
+            text=_process_selected_edit_option,
+            to=(
+                EditEventSteps.ENTER_NEW_NAME.value,
+                EditEventSteps.TOGGLE_REMINDER.value,
+                EditEventSteps.ENTER_NEW_EVENT_CYCLE.value,
+            ),
+        ),
+        EditEventSteps.ENTER_NEW_NAME.value: Step(text=_process_new_event_name),
+        EditEventSteps.TOGGLE_REMINDER.value: Step(
+            text=_process_toggle_reminder, to=(EditEventSteps.ENTER_NEW_EVENT_CYCLE.value,)
+        ),
+        EditEventSteps.ENTER_NEW_EVENT_CYCLE.value: Step(text=_process_new_event_cycle),
+    },
+)
@@ -1,21 +1,20 @@
 import logging
-import uuid
-from datetime import UTC, datetime
+from datetime import datetime
 
 import psycopg
 from linebot.v3.messaging import FlexMessage
 
 import routine_bot.db.chats as chat_db
 import routine_bot.db.events as event_db
-import routine_bot.db.records as record_db
 import routine_bot.messages as msg
 from routine_bot.constants import TZ_TAIPEI
 from routine_bot.enums.chat import ChatStatus, ChatType
 from routine_bot.enums.steps import FindEventSteps
-from routine_bot.errors import InvalidStepError
+from routine_bot.handlers.events.picker import build_event_picker
+from routine_bot.handlers.state_machine import Step, chat_machine
 from routine_bot.logger import add_context, format_logger_name, indent, shorten_uuid
-from routine_bot.models import ChatData
-from routine_bot.utils import get_time_diff, validate_event_name
+from routine_bot.models import ChatData, EventData, EventDetailData
+from routine_bot.utils import get_time_diff, uuid7, validate_event_name
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -29,50 +28,57 @@ def _process_event_name(text: str, chat: ChatData, conn: psycopg.Connection) ->
         cxt_logger.debug("Invalid event name: %r, error msg=%s", event_name, "".join(error_msg))
         return msg.error.error(error_msg)
     user_id = chat.user_id
-    event = event_db.get_event_by_name(user_id, event_name, conn)
+    event = event_db.get_event_detail_by_name(user_id, event_name, conn)
     if event is None:
         cxt_logger.debug("Event not found: user_id=%s, event_name=%r", user_id, event_name)
-        return msg.error.event_name_not_found(event_name)
+        suggestions = event_db.list_similar_event_names(user_id, event_name, conn)
+        return msg.error.event_name_not_found(event_name, suggestions)
     cxt_logger.debug("Event found: event_name=%r, event_id=%s, user_id=%s", event_name, event.event_id, user_id)
+    return _show_event_info(event, chat, conn)
 
-    payload = {}
-    payload["event_name"] = event_name
-    now = datetime.today().astimezone(TZ_TAIPEI)
-    last_done_at = event.last_done_at.astimezone(tz=TZ_TAIPEI)
-    payload["time_diff"] = get_time_diff(now, last_done_at)
+
+def _process_selected_event(event: EventData, chat: ChatData, conn: psycopg.Connection) -> FlexMessage:
+    cxt_logger = add_context(logger, chat_id=chat.chat_id)
+    cxt_logger.debug("Event picked: event_name=%r, event_id=%s", event.event_name, event.event_id)
+    return _show_event_info(event_db.get_event_detail_by_id(event.event_id, conn), chat, conn)
+
+
+def _show_event_info(event: EventDetailData, chat: ChatData, conn: psycopg.Connection) -> FlexMessage:
+    cxt_logger = add_context(logger, chat_id=chat.chat_id)
+    render_data = {}
+    render_data["event_name"] = event.event_name
+    today = datetime.now(TZ_TAIPEI).date()
+    render_data["time_diff"] = get_time_diff(today, event.last_done_at)
     if event.reminder_enabled and event.next_due_at is not None:
-        payload["reminder"] = "True"
-        next_due_at = event.next_due_at.astimezone(tz=TZ_TAIPEI).strftime("%Y-%m-%d")
-        payload["next_due_at"] = next_due_at
-        payload["event_cycle"] = event.event_cycle
+        render_data["reminder"] = "True"
+        render_data["next_due_at"] = event.next_due_at.strftime("%Y-%m-%d")
+        render_data["event_cycle"] = event.event_cycle
     else:
-        payload["reminder"] = "False"
-    recent_records = record_db.list_event_recent_records(event.event_id, conn)
-    recent_records = [t.astimezone(tz=TZ_TAIPEI).strftime("%Y-%m-%d") for t in recent_records]
-    payload["recent_records"] = recent_records
-    chat.payload = chat_db.patch_chat_payload(chat=chat, new_data=payload, conn=conn, logger=logger)
-    chat_db.finalize_chat(chat, conn, logger)
+        render_data["reminder"] = "False"
+    recent_records = [t.strftime("%Y-%m-%d") for t in event.recent_records]
+    render_data["record_count"] = str(event.record_count)
+    chat_machine.finalize(chat, conn)
 
     summary = "\n".join(
         [
             "┌── Event Info ────────────────────────────",
-            f"│ Event Name: {event_name}",
+            f"│ Event Name: {event.event_name}",
             f"│ Event ID: {event.event_id}",
             f"│ User: {chat.user_id}",
             f"│ Reminder: {event.reminder_enabled}",
             f"│ Cycle: {event.event_cycle}",
             f"│ Last Done: {event.last_done_at}",
-            f"│ Next Due: {event.next_due_at.astimezone(UTC) if event.next_due_at else None}",
+            f"│ Next Due: {event.next_due_at}",
             f"│ Recent Records: {len(recent_records)}",
             "└───────────────────────────────────────────",
         ]
     )
     cxt_logger.info(f"Event info retrieved successfully\n{indent(summary)}")
-    return msg.events.find.format_event_info(chat.payload)
+    return msg.events.find.format_event_info(chat.render_context(**render_data), recent_records)
 
 
 def create_find_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessage:
-    chat_id = str(uuid.uuid4())
+    chat_id = str(uuid7())
     cxt_logger = add_context(logger, chat_id=chat_id)
     cxt_logger.info("New chat created: user=%s, chat_type=find_event", shorten_uuid(user_id))
     chat = ChatData(
@@ -84,14 +90,10 @@ def create_find_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessag
         status=ChatStatus.ONGOING.value,
     )
     chat_db.add_chat(chat, conn)
-    return msg.events.find.enter_event_name()
+    return msg.events.find.enter_event_name(build_event_picker(chat, conn))
 
 
-def handle_find_event_chat(text: str, chat: ChatData, conn: psycopg.Connection) -> FlexMessage:
-    cxt_logger = add_context(logger, chat_id=chat.chat_id)
-    cxt_logger.debug("Routing find event chat: step=%s, text=%r", chat.current_step, text)
-    handlers = {FindEventSteps.ENTER_NAME.value: _process_event_name}
-    handler = handlers.get(chat.current_step)
-    if handler:
-        return handler(text, chat, conn)
-    raise InvalidStepError(f"Invalid step in handle_find_event_chat: {chat.current_step}")
+chat_machine.register(
+    ChatType.FIND_EVENT.value,
+    {FindEventSteps.ENTER_NAME.value: Step(text=_process_event_name, picked_event=_process_selected_event)},
+)
@@ -0,0 +1,24 @@
+import psycopg
+from linebot.v3.messaging import QuickReply
+
+import routine_bot.db.events as event_db
+from routine_bot.enums.chat import ChatType
+from routine_bot.messages.utils import event_picker
+from routine_bot.models import ChatData
+
+EVENT_PICKER_PAGE_SIZE = 12  # a quick reply holds up to 13 items, one is kept for the next page button
+
+
+def build_event_picker(chat: ChatData, conn: psycopg.Connection, page: int = 0) -> QuickReply | None:
+    """
+    Offer one page of the user's events as quick replies carrying the event id. Revoking only offers shared events.
+    """
+    event_choices = event_db.list_event_choices_by_user(
+        chat.user_id,
+        conn,
+        limit=EVENT_PICKER_PAGE_SIZE + 1,
+        offset=page * EVENT_PICKER_PAGE_SIZE,
+        shared_only=chat.chat_type == ChatType.REVOKE_EVENT,
+    )
+    has_more = len(event_choices) > EVENT_PICKER_PAGE_SIZE
+    return event_picker(chat.chat_id, event_choices[:EVENT_PICKER_PAGE_SIZE], page, has_more)
@@ -1,6 +1,4 @@
-import ast
 import logging
-import uuid
 
 import psycopg
 from linebot.v3.messaging import FlexMessage, TemplateMessage
@@ -8,13 +6,15 @@ from linebot.v3.messaging import FlexMessage, TemplateMessage
 import routine_bot.db.chats as chat_db
 import routine_bot.db.events as event_db
 import routine_bot.db.shares as share_db
+import routine_bot.db.users as user_db
 import routine_bot.messages as msg
 from routine_bot.enums.chat import ChatStatus, ChatType
 from routine_bot.enums.steps import RevokeEventSteps
-from routine_bot.errors import InvalidStepError
+from routine_bot.handlers.events.picker import build_event_picker
+from routine_bot.handlers.state_machine import Step, chat_machine
 from routine_bot.logger import add_context, format_logger_name, indent, shorten_uuid
-from routine_bot.models import ChatData
-from routine_bot.utils import get_user_profile, validate_event_name
+from routine_bot.models import ChatData, EventData
+from routine_bot.utils import get_user_profile, uuid7, validate_event_name
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -33,42 +33,46 @@ def _process_event_name(text: str, chat: ChatData, conn: psycopg.Connection) ->
     event = event_db.get_event_by_name(user_id, event_name, conn)
     if event is None:
         cxt_logger.debug("Event not found: user=%s, event_name=%r", user_id, event_name)
-        return msg.error.event_name_not_found(event_name)
+        suggestions = event_db.list_similar_event_names(user_id, event_name, conn)
+        return msg.error.event_name_not_found(event_name, suggestions)
+    return _process_selected_event(event, chat, conn)
 
-    recipient_ids = share_db.list_recipients_by_event(event.event_id, conn)
 
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat,
-        new_data={"event_name": event.event_name},
-        conn=conn,
-        logger=logger,
-    )
+def _get_recipient_ids_by_name(event_id: str, conn: psycopg.Connection) -> dict[str, str]:
+    recipient_ids = {}
+    for recipient_id, display_name in share_db.list_recipient_names_by_event(event_id, conn):
+        if display_name is None:
+            # recipients who followed before display names were stored are backfilled on first sight
+            display_name = get_user_profile(recipient_id).display_name
+            user_db.set_user_display_name(recipient_id, display_name, conn)
+        recipient_ids[display_name] = recipient_id
+    return recipient_ids
+
 
+def _process_selected_event(
+    event: EventData, chat: ChatData, conn: psycopg.Connection
+) -> FlexMessage | TemplateMessage:
+    cxt_logger = add_context(logger, chat_id=chat.chat_id)
+    recipient_ids = _get_recipient_ids_by_name(event.event_id, conn)
     if not recipient_ids:
         cxt_logger.debug("No recipients to revoke: event_id=%s", event.event_id)
-        chat_db.finalize_chat(chat, conn, logger)
-        return msg.events.revoke.no_recipient(chat.payload)
-
-    recipient_info = {}
-    for recipient_id in recipient_ids:
-        profile = get_user_profile(recipient_id)
-        recipient_info[profile.display_name] = recipient_id
+        chat_machine.finalize(chat, conn)
+        return msg.events.revoke.no_recipient(chat.render_context(event_name=event.event_name))
 
     cxt_logger.info(
         "%d recipients found for event revocation: %r (%s)",
-        len(recipient_info),
+        len(recipient_ids),
         event.event_name,
         shorten_uuid(event.event_id),
     )
 
-    chat_db.set_chat_current_step(chat.chat_id, RevokeEventSteps.SELECT_RECIPIENT.value, conn)
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat,
-        new_data={"recipient_info": str(recipient_info), "event_id": event.event_id},
-        conn=conn,
-        logger=logger,
+    chat_machine.advance(
+        chat,
+        RevokeEventSteps.SELECT_RECIPIENT.value,
+        conn,
+        new_data={"event_name": event.event_name, "event_id": event.event_id},
     )
-    return msg.events.revoke.select_recipient(chat.payload)
+    return msg.events.revoke.select_recipient(chat.render_context(), list(recipient_ids))
 
 
 def _process_selected_recipient(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
@@ -76,24 +80,18 @@ def _process_selected_recipient(text: str, chat: ChatData, conn: psycopg.Connect
     cxt_logger.debug("Processing selected recipient")
     selected_recipient = text
 
-    recipient_info = ast.literal_eval(chat.payload["recipient_info"])
-    if selected_recipient not in recipient_info:
+    event_id = chat.payload["event_id"]
+    recipient_ids = _get_recipient_ids_by_name(event_id, conn)
+    if selected_recipient not in recipient_ids:
         cxt_logger.debug("Invalid recipient selection: %r", selected_recipient)
-        return msg.events.revoke.recipient_not_found(chat.payload)
+        return msg.events.revoke.recipient_not_found(chat.render_context(), list(recipient_ids))
 
-    event_id = chat.payload["event_id"]
-    recipient_id = recipient_info[selected_recipient]
+    recipient_id = recipient_ids[selected_recipient]
 
     share = share_db.get_share_by_event(event_id, recipient_id, conn)
     share_db.delete_share(event_id, recipient_id, conn)
 
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat,
-        new_data={"selected_recipient": selected_recipient},
-        conn=conn,
-        logger=logger,
-    )
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
 
     summary = "\n".join(
         [
@@ -108,11 +106,11 @@ def _process_selected_recipient(text: str, chat: ChatData, conn: psycopg.Connect
         ]
     )
     cxt_logger.info("Share revoked successfully\n%s", indent(summary))
-    return msg.events.revoke.recipient_revoked(chat.payload)
+    return msg.events.revoke.recipient_revoked(chat.render_context(selected_recipient=selected_recipient))
 
 
 def create_revoke_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessage:
-    chat_id = str(uuid.uuid4())
+    chat_id = str(uuid7())
     cxt_logger = add_context(logger, chat_id=chat_id)
     cxt_logger.info("New chat created: user=%s, chat_type=revoke_event", user_id)
 
@@ -125,17 +123,17 @@ def create_revoke_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMess
         status=ChatStatus.ONGOING.value,
     )
     chat_db.add_chat(chat, conn)
-    return msg.events.revoke.enter_event_name()
-
-
-def handle_revoke_event_chat(text: str, chat: ChatData, conn: psycopg.Connection):
-    cxt_logger = add_context(logger, chat_id=chat.chat_id)
-    cxt_logger.debug("Routing revoke event chat: step=%s, text=%r", chat.current_step, text)
-    handlers = {
-        RevokeEventSteps.ENTER_NAME.value: _process_event_name,
-        RevokeEventSteps.SELECT_RECIPIENT.value: _process_selected_recipient,
-    }
-    handler = handlers.get(chat.current_step)
-    if handler:
-        return handler(text, chat, conn)
-    raise InvalidStepError(f"Invalid step in handle_revoke_event_chat: {chat.current_step}")
+    return msg.events.revoke.enter_event_name(build_event_picker(chat, conn))
+
+
+chat_machine.register(
+    ChatType.REVOKE_EVENT.value,
+    {
+        RevokeEventSteps.ENTER_NAME.value: Step(
+            text=_process_event_name,
+            picked_event=_process_selected_event,
+            to=(RevokeEventSteps.SELECT_RECIPIENT.value,),
+        ),
+        RevokeEventSteps.SELECT_RECIPIENT.value: Step(text=_process_selected_recipient),
+    },
+)
@@ -1,6 +1,5 @@
 import base64
 import logging
-import uuid
 
 import psycopg
 from linebot.v3.messaging import FlexMessage, TemplateMessage
@@ -10,10 +9,11 @@ import routine_bot.db.events as event_db
 import routine_bot.messages as msg
 from routine_bot.enums.chat import ChatStatus, ChatType
 from routine_bot.enums.steps import ShareEventSteps
-from routine_bot.errors import InvalidStepError
+from routine_bot.handlers.events.picker import build_event_picker
+from routine_bot.handlers.state_machine import Step, chat_machine
 from routine_bot.logger import add_context, format_logger_name, shorten_uuid
-from routine_bot.models import ChatData
-from routine_bot.utils import validate_event_name
+from routine_bot.models import ChatData, EventData
+from routine_bot.utils import uuid7, validate_event_name
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -36,36 +36,40 @@ def _process_event_name(text: str, chat: ChatData, conn: psycopg.Connection) ->
     event = event_db.get_event_by_name(user_id, event_name, conn)
     if event is None:
         cxt_logger.debug("Event not found: user_id=%s, event_name=%r", shorten_uuid(user_id), event_name)
-        return msg.error.event_name_not_found(event_name)
+        suggestions = event_db.list_similar_event_names(user_id, event_name, conn)
+        return msg.error.event_name_not_found(event_name, suggestions)
+    return _process_selected_event(event, chat, conn)
 
-    chat.payload = chat_db.patch_chat_payload(chat=chat, new_data={"event_name": event_name}, conn=conn, logger=logger)
 
+def _process_selected_event(
+    event: EventData, chat: ChatData, conn: psycopg.Connection
+) -> FlexMessage | TemplateMessage:
+    cxt_logger = add_context(logger, chat_id=chat.chat_id)
     if not event.reminder_enabled:
         cxt_logger.info("Share rejected: reminder disabled (event_id=%s)", shorten_uuid(event.event_id))
-        chat_db.finalize_chat(chat, conn, logger)
-        return msg.events.share.invalid_event_must_enable_reminder(chat.payload)
+        chat_machine.finalize(chat, conn)
+        return msg.events.share.invalid_event_must_enable_reminder(chat.render_context(event_name=event.event_name))
 
     if event.share_count >= 4:
         cxt_logger.info("Share rejected: max share count reached)")
-        chat_db.finalize_chat(chat, conn, logger)
-        return msg.events.share.reached_max_share_count(chat.payload)
+        chat_machine.finalize(chat, conn)
+        return msg.events.share.reached_max_share_count(chat.render_context(event_name=event.event_name))
 
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat, new_data={"share_code": _create_share_code(event.event_id)}, conn=conn, logger=logger
-    )
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
 
     cxt_logger.info(
         "Share event initialized: user=%s, event=%r (%s)",
-        shorten_uuid(user_id),
+        shorten_uuid(chat.user_id),
         event.event_name,
         shorten_uuid(event.event_id),
     )
-    return msg.events.share.show_recipient_instruction(chat.payload)
+    return msg.events.share.show_recipient_instruction(
+        chat.render_context(event_name=event.event_name, share_code=_create_share_code(event.event_id))
+    )
 
 
 def create_share_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessage:
-    chat_id = str(uuid.uuid4())
+    chat_id = str(uuid7())
     cxt_logger = add_context(logger, chat_id=chat_id)
     cxt_logger.info("New chat created: user=%s, chat_type=share_event", shorten_uuid(user_id))
 
@@ -78,15 +82,10 @@ def create_share_event_chat(user_id: str, conn: psycopg.Connection) -> FlexMessa
         status=ChatStatus.ONGOING.value,
     )
     chat_db.add_chat(chat, conn)
-    return msg.events.share.enter_event_name()
+    return msg.events.share.enter_event_name(build_event_picker(chat, conn))
 
 
-def handle_share_event_chat(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
-    cxt_logger = add_context(logger, chat_id=chat.chat_id)
-    cxt_logger.debug("Routing share event chat: step=%s, text=%r", chat.current_step, text)
-
-    handlers = {ShareEventSteps.ENTER_NAME.value: _process_event_name}
-    handler = handlers.get(chat.current_step)
-    if handler:
-        return handler(text, chat, conn)
-    raise InvalidStepError(f"Invalid step in handle_share_event_chat: {chat.current_step}")
+chat_machine.register(
+    ChatType.SHARE_EVENT.value,
+    {ShareEventSteps.ENTER_NAME.value: Step(text=_process_event_name, picked_event=_process_selected_event)},
+)
@@ -0,0 +1,25 @@
+import logging
+
+import psycopg
+from linebot.v3.messaging import FlexMessage
+
+import routine_bot.db.stats as stats_db
+import routine_bot.messages as msg
+from routine_bot.logger import format_logger_name, indent
+
+logger = logging.getLogger(format_logger_name(__name__))
+
+
+def handle_stats_chat(user_id: str, conn: psycopg.Connection) -> FlexMessage:
+    event_stats = stats_db.list_event_stats_by_user(user_id, conn)
+
+    summary = "\n".join(
+        [
+            "┌── Event Stats ────────────────────────────",
+            f"│ User: {user_id}",
+            f"│ Events: {len(event_stats)}",
+            "└───────────────────────────────────────────",
+        ]
+    )
+    logger.info("Event stats retrieved successfully\n%s", indent(summary))
+    return msg.events.stats.format_event_stats(event_stats)
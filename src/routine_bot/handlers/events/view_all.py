@@ -5,48 +5,60 @@ import psycopg
 from linebot.v3.messaging import FlexMessage
 
 import routine_bot.db.events as event_db
-import routine_bot.db.shares as share_db
+import routine_bot.db.users as user_db
 import routine_bot.messages as msg
 from routine_bot.constants import TZ_TAIPEI
 from routine_bot.logger import format_logger_name, indent
+from routine_bot.models import EventSummaryLine
+from routine_bot.summary_cache import summary_cache
 from routine_bot.utils import get_time_diff, get_user_profile
 
 logger = logging.getLogger(format_logger_name(__name__))
 
 
 def handle_view_all_chat(user_id: str, conn: psycopg.Connection) -> FlexMessage:
-    user_events = event_db.list_events_by_user(user_id, conn)
-    shared_events = share_db.list_shared_events_by_user(user_id, conn)
-    all_events = user_events + shared_events
+    today = datetime.now(TZ_TAIPEI).date()
+    cached_summary = summary_cache.get(user_id, today)
+    if cached_summary is not None:
+        logger.info(f"Event list served from cache: {user_id}")
+        return cached_summary
 
+    all_events = event_db.list_event_summaries_by_user(user_id, conn)
+    owned_count = 0
+    owner_names = {}
     event_summaries = []
     for event in all_events:
-        new_entry = {}
-        new_entry["event_name"] = event.event_name
-        if event.user_id != user_id:
-            owner_profile = get_user_profile(event.user_id)
-            new_entry["owner_name"] = owner_profile.display_name
+        if event.user_id == user_id:
+            owned_count += 1
+            owner_name = None
+        elif event.owner_name is not None:
+            owner_name = event.owner_name
         else:
-            new_entry["owner_name"] = ""
-        now = datetime.today().astimezone(TZ_TAIPEI)
-        last_done_at = event.last_done_at.astimezone(tz=TZ_TAIPEI)
-        new_entry["time_diff"] = get_time_diff(now, last_done_at)
-        if event.reminder_enabled and event.next_due_at is not None:
-            new_entry["next_reminder"] = event.next_due_at.astimezone(tz=TZ_TAIPEI).strftime("%Y-%m-%d")
-        else:
-            new_entry["next_reminder"] = ""
-        event_summaries.append(new_entry)
-    payload = {"event_summaries": str(event_summaries)}
+            # owners who followed before display names were stored are backfilled on first sight
+            if event.user_id not in owner_names:
+                owner_names[event.user_id] = get_user_profile(event.user_id).display_name
+                user_db.set_user_display_name(event.user_id, owner_names[event.user_id], conn)
+            owner_name = owner_names[event.user_id]
+        event_summaries.append(
+            EventSummaryLine(
+                event_name=event.event_name,
+                owner_name=owner_name,
+                time_diff=get_time_diff(today, event.last_done_at),
+                next_reminder=event.next_due_at if event.reminder_enabled else None,
+            )
+        )
 
     summary = "\n".join(
         [
             "┌── All Events ─────────────────────────────",
             f"│ User: {user_id}",
-            f"│ Owned Events: {len(user_events)}",
-            f"│ Shared Events: {len(shared_events)}",
-            f"│ Total Events: {len(user_events) + len(shared_events)}",
+            f"│ Owned Events: {owned_count}",
+            f"│ Shared Events: {len(all_events) - owned_count}",
+            f"│ Total Events: {len(all_events)}",
             "└───────────────────────────────────────────",
         ]
     )
     logger.info("Event list retrieved successfully\n%s", indent(summary))
-    return msg.events.view_all.format_all_events_summary(payload)
+    summary_msg = msg.events.view_all.format_all_events_summary(event_summaries)
+    summary_cache.put(user_id, today, [event.event_id for event in all_events], summary_msg)
+    return summary_msg
@@ -25,11 +25,11 @@ import routine_bot.db.events as event_db
 import routine_bot.db.users as user_db
 import routine_bot.messages as msg
 from routine_bot.constants import DATABASE_URL, LINE_CHANNEL_ACCESS_TOKEN, LINE_CHANNEL_SECRET
-from routine_bot.enums.chat import ChatStatus, ChatType
+from routine_bot.enums.chat import ChatInput, ChatStatus, ChatType
 from routine_bot.enums.command import SUPPORTED_COMMANDS, Command
-from routine_bot.enums.steps import DoneEventSteps, NewEventSteps, UserSettingsSteps
-from routine_bot.errors import ChatNotFoundError, InvalidChatTypeError, InvalidCommandError
+from routine_bot.errors import InvalidCommandError
 from routine_bot.handlers.events import (
+    build_event_picker,
     create_delete_event_chat,
     create_done_event_chat,
     create_edit_event_chat,
@@ -38,26 +38,16 @@ from routine_bot.handlers.events import (
     create_receive_event_chat,
     create_revoke_event_chat,
     create_share_event_chat,
-    handle_delete_event_chat,
-    handle_done_event_chat,
-    handle_edit_event_chat,
-    handle_find_event_chat,
-    handle_new_event_chat,
-    handle_receive_event_chat,
-    handle_revoke_event_chat,
-    handle_share_event_chat,
+    handle_stats_chat,
     handle_view_all_chat,
-    process_selected_done_date,
-    process_selected_start_date,
-)
-from routine_bot.handlers.users import (
-    create_user_settings_chat,
-    handle_user_settings_chat,
-    process_new_time_slot_selection,
 )
+from routine_bot.handlers.reminder import process_reminder_action
+from routine_bot.handlers.state_machine import chat_machine
+from routine_bot.handlers.users import create_user_settings_chat
+from routine_bot.identity_map import request_scope
 from routine_bot.logger import add_context, format_logger_name
 from routine_bot.models import ChatData
-from routine_bot.utils import sanitize_msg
+from routine_bot.utils import get_user_profile, parse_postback_data, sanitize_msg
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -65,51 +55,44 @@ configuration = Configuration(access_token=LINE_CHANNEL_ACCESS_TOKEN)
 handler = WebhookHandler(LINE_CHANNEL_SECRET)
 
 
+_COMMAND_HANDLERS = {
+    Command.NEW.value: create_new_event_chat,
+    Command.FIND.value: create_find_event_chat,
+    Command.DELETE.value: create_delete_event_chat,
+    Command.VIEW_ALL.value: handle_view_all_chat,
+    Command.STATS.value: handle_stats_chat,
+    Command.DONE.value: create_done_event_chat,
+    Command.EDIT.value: create_edit_event_chat,
+    Command.SHARE.value: create_share_event_chat,
+    Command.RECEIVE.value: create_receive_event_chat,
+    Command.REVOKE.value: create_revoke_event_chat,
+    Command.SETTINGS.value: create_user_settings_chat,
+    Command.MENU.value: lambda user_id, conn: msg.users.menu.format_menu(),
+    Command.HELP.value: lambda user_id, conn: msg.users.help.format_help(),
+}
+
+# the name prompt of each chat type with an event picker, re-sent with the requested page
+_EVENT_PICKER_PROMPTS = {
+    ChatType.FIND_EVENT.value: msg.events.find.enter_event_name,
+    ChatType.DONE_EVENT.value: msg.events.done.enter_event_name,
+    ChatType.EDIT_EVENT.value: msg.events.edit.enter_event_name,
+    ChatType.DELETE_EVENT.value: msg.events.delete.enter_event_name,
+    ChatType.SHARE_EVENT.value: msg.events.share.enter_event_name,
+    ChatType.REVOKE_EVENT.value: msg.events.revoke.enter_event_name,
+}
+
+
 def _handle_command(text: str, user_id: str, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
-    handlers = {
-        Command.NEW.value: create_new_event_chat,
-        Command.FIND.value: create_find_event_chat,
-        Command.DELETE.value: create_delete_event_chat,
-        Command.VIEW_ALL.value: handle_view_all_chat,
-        Command.DONE.value: create_done_event_chat,
-        Command.EDIT.value: create_edit_event_chat,
-        Command.SHARE.value: create_share_event_chat,
-        Command.RECEIVE.value: create_receive_event_chat,
-        Command.REVOKE.value: create_revoke_event_chat,
-        Command.SETTINGS.value: create_user_settings_chat,
-        Command.MENU.value: lambda user_id, conn: msg.users.menu.format_menu(),
-        Command.HELP.value: lambda user_id, conn: msg.users.help.format_help(),
-    }
-
-    handler = handlers.get(text)
+    handler = _COMMAND_HANDLERS.get(text)
     if handler:
         return handler(user_id, conn)
     raise InvalidCommandError(f"Invalid command in _handle_command: {text}")
 
 
-def _handle_ongoing_chat(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage | FlexMessage:
-    handlers = {
-        ChatType.NEW_EVENT.value: handle_new_event_chat,
-        ChatType.FIND_EVENT.value: handle_find_event_chat,
-        ChatType.DELETE_EVENT.value: handle_delete_event_chat,
-        ChatType.DONE_EVENT.value: handle_done_event_chat,
-        ChatType.EDIT_EVENT.value: handle_edit_event_chat,
-        ChatType.SHARE_EVENT.value: handle_share_event_chat,
-        ChatType.RECEIVE_EVENT.value: handle_receive_event_chat,
-        ChatType.REVOKE_EVENT.value: handle_revoke_event_chat,
-        ChatType.USER_SETTINGS.value: handle_user_settings_chat,
-    }
-
-    handler = handlers.get(chat.chat_type)
-    if handler:
-        return handler(text, chat, conn)
-    raise InvalidChatTypeError(f"Invalid chat type in handle_ongoing_chat: {chat.chat_type}")
-
-
 def _get_reply_message(text: str, user_id: str) -> TextMessage | TemplateMessage | FlexMessage:
     logger.debug(f"Message received: {text}")
 
-    with psycopg.connect(conninfo=DATABASE_URL) as conn:
+    with request_scope(), psycopg.connect(conninfo=DATABASE_URL) as conn:
         chat = chat_db.get_ongoing_chat(user_id, conn)
         if chat is None:
             if text == Command.ABORT:
@@ -129,7 +112,25 @@ def _get_reply_message(text: str, user_id: str) -> TextMessage | TemplateMessage
             chat_db.set_chat_status(chat.chat_id, ChatStatus.ABORTED.value, conn)
             return msg.abort.ongoing_chat_aborted()
 
-        return _handle_ongoing_chat(text, chat, conn)
+        return chat_machine.dispatch(chat, ChatInput.TEXT, text, conn)
+
+
+def _handle_event_picker(
+    data: dict[str, str], chat: ChatData, conn: psycopg.Connection
+) -> TemplateMessage | FlexMessage | None:
+    if not chat_machine.accepts(chat, ChatInput.PICKED_EVENT):
+        return None
+
+    ctx_logger = add_context(logger, chat_id=chat.chat_id)
+    if "page" in data:
+        ctx_logger.debug(f"Event picker page requested: {data['page']}")
+        return _EVENT_PICKER_PROMPTS[chat.chat_type](build_event_picker(chat, conn, int(data["page"])))
+
+    event = event_db.get_event_by_id(data["event_id"], conn)
+    if event is None or event.user_id != chat.user_id:
+        ctx_logger.info(f"Picked event is no longer available: {data['event_id']}")
+        return msg.error.picked_event_not_found()
+    return chat_machine.dispatch(chat, ChatInput.PICKED_EVENT, event, conn)
 
 
 # --------------------------- LINE Event Handlers ---------------------------- #
@@ -147,6 +148,7 @@ def handle_follow_event(event: FollowEvent) -> None:
             logger.info(f"Unblocked by user: {user_id}")
             user_db.set_user_activeness(user_id, True, conn)
             event_db.set_all_events_activeness_by_user(user_id, True, conn)
+        user_db.set_user_display_name(user_id, get_user_profile(user_id).display_name, conn)
 
     with ApiClient(configuration) as api_client:
         line_bot_api = MessagingApi(api_client)
@@ -175,22 +177,32 @@ def handle_unfollow_event(event: UnfollowEvent) -> None:
 def handle_postback_event(event: PostbackEvent) -> None:
     logger.debug(f"Postback data: {event.postback.data}")
     logger.debug(f"Postback params: {event.postback.params}")
-    chat_id = event.postback.data
-
-    with psycopg.connect(conninfo=DATABASE_URL) as conn:
+    data = parse_postback_data(event.postback.data)
+
+    if "action" in data:
+        with request_scope(), psycopg.connect(conninfo=DATABASE_URL) as conn:
+            reply_msg = process_reminder_action(data, event.source.user_id, conn)
+        with ApiClient(configuration) as api_client:
+            line_bot_api = MessagingApi(api_client)
+            line_bot_api.reply_message(ReplyMessageRequest(reply_token=event.reply_token, messages=[reply_msg]))
+        return None
+
+    chat_id = data["chat_id"]
+    with request_scope(), psycopg.connect(conninfo=DATABASE_URL) as conn:
         chat = chat_db.get_chat(chat_id, conn)
-        if chat is None:
-            raise ChatNotFoundError(f"Chat not found: {chat_id}")
-
-        handlers = {
-            (ChatType.NEW_EVENT, NewEventSteps.SELECT_START_DATE): process_selected_start_date,
-            (ChatType.USER_SETTINGS, UserSettingsSteps.SELECT_NEW_TIME_SLOT): process_new_time_slot_selection,
-            (ChatType.DONE_EVENT, DoneEventSteps.SELECT_DONE_DATE): process_selected_done_date,
-        }
-        handler = handlers.get((chat.chat_type, chat.current_step))
-        if not handler:
+        if chat is None or chat.status != ChatStatus.ONGOING:
+            # archived by the retention job or aborted, while its buttons stay in the chat history
+            logger.info(f"Ignoring postback for a chat that is no longer ongoing: {chat_id}")
+            return None
+
+        if "event_id" in data or "page" in data:
+            reply_msg = _handle_event_picker(data, chat, conn)
+        elif chat_machine.accepts(chat, ChatInput.POSTBACK):
+            reply_msg = chat_machine.dispatch(chat, ChatInput.POSTBACK, event, conn)
+        else:
+            reply_msg = None
+        if reply_msg is None:
             return None
-        reply_msg = handler(event, chat, conn)
 
     with ApiClient(configuration) as api_client:
         line_bot_api = MessagingApi(api_client)
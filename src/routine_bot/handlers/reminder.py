@@ -1,60 +1,73 @@
 import logging
-from datetime import UTC, datetime
+from datetime import datetime
 
 import psycopg
-from linebot.v3.messaging import MessagingApi, PushMessageRequest
+from linebot.v3.messaging import FlexMessage, MessagingApi, PushMessageRequest
 
 import routine_bot.db.events as event_db
-import routine_bot.db.shares as share_db
 import routine_bot.messages as msg
 from routine_bot.constants import TZ_TAIPEI
+from routine_bot.handlers.events.done import process_done_today_action
 from routine_bot.logger import add_context, format_logger_name, shorten_uuid
-from routine_bot.utils import get_time_diff, get_user_profile
+from routine_bot.models import ReminderData
+from routine_bot.utils import get_time_diff, get_user_profile, sign_event_action, verify_event_action
 
 logger = logging.getLogger(format_logger_name(__name__))
 
 
-def send_reminders_for_user_owned_events(user_id: str, line_bot_api: MessagingApi, conn: psycopg.Connection) -> int:
-    cxt_logger = add_context(logger, user_id=user_id)
-    events = event_db.list_overdue_events_by_user(user_id, conn)
-    if not len(events):
-        cxt_logger.info("No overdue event found")
-        return 0
-
-    cxt_logger.info("Found %s overdue events", len(events))
-    for event in events:
-        payload = {}
-        payload["event_name"] = event.event_name
-        payload["event_cycle"] = event.event_cycle
-        payload["last_done_at"] = event.last_done_at.strftime("%Y-%m-%d")
-        if event.next_due_at is not None:
-            payload["time_diff"] = get_time_diff(datetime.now(UTC), event.next_due_at)
-            payload["next_due_at"] = event.next_due_at.astimezone(tz=TZ_TAIPEI).strftime("%Y-%m-%d")
-        push_msg = msg.reminder.user_owned_event(payload)
-        line_bot_api.push_message(PushMessageRequest(to=user_id, messages=[push_msg]))
-        cxt_logger.info("Reminder sent for event %s", shorten_uuid(event.event_id))
-    return len(events)
-
-
-def send_reminders_for_shared_events(user_id: str, line_bot_api: MessagingApi, conn: psycopg.Connection) -> int:
+def _build_reminder_payload(reminder: ReminderData) -> dict[str, str]:
+    payload = {}
+    payload["event_name"] = reminder.event_name
+    payload["event_cycle"] = reminder.event_cycle
+    payload["last_done_at"] = reminder.last_done_at.strftime("%Y-%m-%d")
+    payload["time_diff"] = get_time_diff(datetime.now(TZ_TAIPEI).date(), reminder.next_due_at)
+    payload["next_due_at"] = reminder.next_due_at.strftime("%Y-%m-%d")
+    payload["event_id"] = reminder.event_id
+    return payload
+
+
+def send_user_owned_event_reminder(reminder: ReminderData, line_bot_api: MessagingApi) -> None:
+    cxt_logger = add_context(logger, user_id=reminder.recipient_id)
+    payload = _build_reminder_payload(reminder)
+    payload["done_sig"] = sign_event_action("done", reminder.event_id, reminder.recipient_id)
+    push_msg = msg.reminder.user_owned_event(payload)
+    line_bot_api.push_message(PushMessageRequest(to=reminder.recipient_id, messages=[push_msg]))
+    cxt_logger.info("Reminder sent for event %s", shorten_uuid(reminder.event_id))
+
+
+def send_shared_event_reminder(reminder: ReminderData, line_bot_api: MessagingApi) -> None:
+    cxt_logger = add_context(logger, user_id=reminder.recipient_id)
+    payload = _build_reminder_payload(reminder)
+    owner_profile = get_user_profile(reminder.owner_id)
+    payload["owner_name"] = owner_profile.display_name
+    push_msg = msg.reminder.shared_event(payload)
+    line_bot_api.push_message(PushMessageRequest(to=reminder.recipient_id, messages=[push_msg]))
+    cxt_logger.info("Reminder sent for shared event %s", shorten_uuid(reminder.event_id))
+
+
+_EVENT_ACTION_HANDLERS = {"done": process_done_today_action}
+
+
+# this function is called by handle_postback in handlers/main.py, without a chat
+def process_reminder_action(data: dict[str, str], user_id: str, conn: psycopg.Connection) -> FlexMessage:
+    """
+    Handle the one-tap buttons of a reminder in the webhook's single transaction.
+
+    The signature binds the action and event to the recipient the reminder was pushed to. Only the owner may act on
+    an event, and ownership is checked again, since the event may have been deleted since.
+    """
     cxt_logger = add_context(logger, user_id=user_id)
-    events = share_db.list_overdue_shared_events_by_user(user_id, conn)
-    if not len(events):
-        cxt_logger.info("No overdue shared event found")
-        return 0
-
-    cxt_logger.info("Found %s overdue shared events", len(events))
-    for event in events:
-        payload = {}
-        owner_profile = get_user_profile(event.user_id)
-        payload["owner_name"] = owner_profile.display_name
-        payload["event_name"] = event.event_name
-        payload["event_cycle"] = event.event_cycle
-        payload["last_done_at"] = event.last_done_at.strftime("%Y-%m-%d")
-        if event.next_due_at is not None:
-            payload["time_diff"] = get_time_diff(datetime.now(UTC), event.next_due_at)
-            payload["next_due_at"] = event.next_due_at.astimezone(tz=TZ_TAIPEI).strftime("%Y-%m-%d")
-        push_msg = msg.reminder.shared_event(event, owner_profile.display_name)
-        line_bot_api.push_message(PushMessageRequest(to=user_id, messages=[push_msg]))
-        cxt_logger.info("Reminder sent for shared event %s", shorten_uuid(event.event_id))
-    return len(events)
+    action, event_id = data["action"], data["event_id"]
+    if not verify_event_action(action, event_id, user_id, data.get("sig", "")):
+        cxt_logger.warning("Rejected reminder action with a bad signature: %s on %s", action, event_id)
+        return msg.reminder.action_unavailable()
+
+    event = event_db.get_event_by_id(event_id, conn)
+    if event is None or event.user_id != user_id:
+        cxt_logger.info("Reminder action on an unavailable event: %s on %s", action, event_id)
+        return msg.reminder.action_unavailable()
+
+    handler = _EVENT_ACTION_HANDLERS.get(action)
+    if handler is None:
+        return msg.reminder.action_unavailable()
+    return handler(event, user_id, conn)
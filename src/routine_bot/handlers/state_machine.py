@@ -0,0 +1,107 @@
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import psycopg
+from linebot.v3.messaging import FlexMessage, TemplateMessage
+
+import routine_bot.db.chats as chat_db
+from routine_bot.enums.chat import ChatInput, ChatStatus
+from routine_bot.enums.steps import BaseSteps
+from routine_bot.errors import InvalidStepError
+from routine_bot.logger import add_context, format_logger_name
+from routine_bot.models import ChatData
+
+logger = logging.getLogger(format_logger_name(__name__))
+
+# (input, chat, conn), where the input is the text, the PostbackEvent or the picked EventData
+StepHandler = Callable[..., TemplateMessage | FlexMessage]
+
+
+@dataclass(slots=True, frozen=True)
+class Step:
+    text: StepHandler | None = None
+    postback: StepHandler | None = None
+    picked_event: StepHandler | None = None
+    to: tuple[str, ...] = ()
+
+
+class ChatStateMachine:
+    """
+    Registry of the steps of every chat type, filled by the handler modules at import.
+
+    Each step declares a handler per kind of input it accepts and the steps it may move to. Dispatch is a single
+    lookup by (chat type, step, input), and `advance` refuses undeclared transitions. Both `advance` and
+    `finalize` apply their changes to the chat in memory and persist them in one write, so a turn writes the chat
+    once. The payload only carries what later steps need; data that only renders a reply goes through
+    `ChatData.render_context` instead.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[tuple[str, str, ChatInput], StepHandler] = {}
+        self._transitions: dict[tuple[str, str], frozenset[str]] = {}
+
+    def register(self, chat_type: str, steps: dict[str, Step]) -> None:
+        for step, spec in steps.items():
+            if (chat_type, step) in self._transitions:
+                raise ValueError(f"Step registered twice: {chat_type}/{step}")
+            for target in spec.to:
+                if target not in steps:
+                    raise ValueError(f"Transition to an unknown step: {chat_type}/{step} -> {target}")
+            self._transitions[(chat_type, step)] = frozenset(spec.to)
+            for kind, handler in (
+                (ChatInput.TEXT, spec.text),
+                (ChatInput.POSTBACK, spec.postback),
+                (ChatInput.PICKED_EVENT, spec.picked_event),
+            ):
+                if handler is not None:
+                    self._handlers[(chat_type, step, kind)] = handler
+
+    def accepts(self, chat: ChatData, kind: ChatInput) -> bool:
+        return (chat.chat_type, chat.current_step, kind) in self._handlers
+
+    def dispatch(
+        self, chat: ChatData, kind: ChatInput, value: object, conn: psycopg.Connection
+    ) -> TemplateMessage | FlexMessage:
+        handler = self._handlers.get((chat.chat_type, chat.current_step, kind))
+        if handler is None:
+            raise InvalidStepError(f"No {kind} handler for step: {chat.chat_type}/{chat.current_step}")
+        cxt_logger = add_context(logger, chat_id=chat.chat_id)
+        step = chat.current_step
+        start_time = time.perf_counter()
+        try:
+            return handler(value, chat, conn)
+        finally:
+            elapsed_time = time.perf_counter() - start_time
+            cxt_logger.debug(f"Step handled: {chat.chat_type}/{step} ({kind}) in {elapsed_time * 1000:.1f} ms")
+
+    def _apply(self, chat: ChatData, new_data: dict[str, str] | None) -> None:
+        cxt_logger = add_context(logger, chat_id=chat.chat_id)
+        for key, val in (new_data or {}).items():
+            if chat.payload.get(key) is None:
+                cxt_logger.debug(f"Adding to payload: {key}={val}")
+            else:
+                cxt_logger.debug(f"Overwriting payload: {key}={val} (was {chat.payload[key]})")
+            chat.payload[key] = val
+
+    def advance(
+        self, chat: ChatData, to: str, conn: psycopg.Connection, new_data: dict[str, str] | None = None
+    ) -> None:
+        allowed = self._transitions.get((chat.chat_type, chat.current_step), frozenset())
+        if to not in allowed:
+            raise InvalidStepError(f"Transition not allowed: {chat.chat_type}/{chat.current_step} -> {to}")
+        self._apply(chat, new_data)
+        chat.current_step = to
+        chat_db.save_chat(chat, conn)
+
+    def finalize(self, chat: ChatData, conn: psycopg.Connection) -> None:
+        # every step may end the chat, and the payload is not needed past it, so only the step and status are written
+        chat.current_step = BaseSteps.COMPLETED.value
+        chat.status = ChatStatus.COMPLETED.value
+        chat_db.complete_chat(chat.chat_id, conn)
+        cxt_logger = add_context(logger, chat_id=chat.chat_id)
+        cxt_logger.info("Chat finalized")
+
+
+chat_machine = ChatStateMachine()
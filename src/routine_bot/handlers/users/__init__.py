@@ -1,5 +1 @@
 from .settings import create_user_settings_chat as create_user_settings_chat
-from .settings import handle_user_settings_chat as handle_user_settings_chat
-from .settings import (
-    process_new_time_slot_selection as process_new_time_slot_selection,
-)
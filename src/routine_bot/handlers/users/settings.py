@@ -1,5 +1,4 @@
 import logging
-import uuid
 from datetime import datetime
 
 import psycopg
@@ -13,9 +12,11 @@ import routine_bot.messages as msg
 from routine_bot.enums.chat import ChatStatus, ChatType
 from routine_bot.enums.options import UserSettingsOptions
 from routine_bot.enums.steps import UserSettingsSteps
-from routine_bot.errors import InvalidStepError, UserNotFoundError
+from routine_bot.errors import UserNotFoundError
+from routine_bot.handlers.state_machine import Step, chat_machine
 from routine_bot.logger import add_context, format_logger_name, indent, shorten_uuid
 from routine_bot.models import ChatData
+from routine_bot.utils import uuid7
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -24,18 +25,16 @@ def _prepare_new_time_slot_selection(chat: ChatData, conn: psycopg.Connection) -
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.info("Option selected: New time slot")
     user = user_db.get_user(chat.user_id, conn)
-    chat_db.set_chat_current_step(chat.chat_id, UserSettingsSteps.SELECT_NEW_TIME_SLOT.value, conn)
-    chat.payload = chat_db.patch_chat_payload(
-        chat=chat,
-        new_data={"chat_id": chat.chat_id, "current_slot": user.notification_slot.strftime("%H:%M")},
-        conn=conn,
-        logger=logger,
+    chat_machine.advance(
+        chat,
+        UserSettingsSteps.SELECT_NEW_TIME_SLOT.value,
+        conn,
+        new_data={"current_slot": user.notification_slot.strftime("%H:%M")},
     )
-    return msg.users.settings.select_new_time_slot(chat.payload)
+    return msg.users.settings.select_new_time_slot(chat.render_context())
 
 
-# this function is called by handle_postback in handlers/main.py
-def process_new_time_slot_selection(
+def _process_new_time_slot_selection(
     postback: PostbackEvent, chat: ChatData, conn: psycopg.Connection
 ) -> TemplateMessage | FlexMessage:
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
@@ -47,30 +46,31 @@ def process_new_time_slot_selection(
     time_slot = postback.postback.params["time"]
     if time_slot.split(":")[1] != "00":
         cxt_logger.debug("Invalid time slot selected (minute must be 00): %r", time_slot)
-        return msg.users.settings.invalid_time_slot(chat.payload)
+        return msg.users.settings.invalid_time_slot(chat.render_context())
     user_db.set_user_time_slot(chat.user_id, datetime.strptime(time_slot, "%H:%M").time(), conn)
     cxt_logger.info("Time slot set to: %s", time_slot)
-    chat.payload = chat_db.patch_chat_payload(chat=chat, new_data={"new_slot": time_slot}, conn=conn, logger=logger)
-    chat_db.finalize_chat(chat, conn, logger)
+    chat_machine.finalize(chat, conn)
 
     summary = "\n".join(
         [
             "┌── User Settings Updated ─────────────────",
             f"│ User: {shorten_uuid(chat.user_id)}",
             "│ Change: Notification time slot",
-            f"│ Details: {chat.payload['current_slot']} → {chat.payload['new_slot']}",
+            f"│ Details: {chat.payload['current_slot']} → {time_slot}",
             "└───────────────────────────────────────────",
         ]
     )
     cxt_logger.info("User settings updated successfully\n%s", indent(summary))
-    return msg.users.settings.succeeded(chat.payload)
+    return msg.users.settings.succeeded(chat.render_context(new_slot=time_slot))
+
+
+_OPTION_HANDLERS = {UserSettingsOptions.TIME_SLOT.value: _prepare_new_time_slot_selection}
 
 
 def _process_selected_option(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage:
     cxt_logger = add_context(logger, chat_id=chat.chat_id)
     cxt_logger.debug("Processing user settings option")
-    handlers = {UserSettingsOptions.TIME_SLOT.value: _prepare_new_time_slot_selection}
-    handler = handlers.get(text)
+    handler = _OPTION_HANDLERS.get(text)
     if handler:
         cxt_logger.debug("Option selected: %r", text)
         return handler(chat, conn)
@@ -79,7 +79,7 @@ def _process_selected_option(text: str, chat: ChatData, conn: psycopg.Connection
 
 
 def create_user_settings_chat(user_id: str, conn: psycopg.Connection) -> TemplateMessage:
-    chat_id = str(uuid.uuid4())
+    chat_id = str(uuid7())
     cxt_logger = add_context(logger, chat_id=chat_id)
     cxt_logger.info("New chat created: user=%s, chat_type=user_settings", shorten_uuid(user_id))
 
@@ -95,16 +95,18 @@ def create_user_settings_chat(user_id: str, conn: psycopg.Connection) -> Templat
     return msg.users.settings.select_option()
 
 
-def handle_user_settings_chat(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage:
-    cxt_logger = add_context(logger, chat_id=chat.chat_id)
-    cxt_logger.debug("Routing user settings chat: step=%s, text=%r", chat.current_step, text)
-    handlers = {
-        UserSettingsSteps.SELECT_OPTION.value: _process_selected_option,
-        UserSettingsSteps.SELECT_NEW_TIME_SLOT.value: lambda text, chat, conn: msg.users.settings.invalid_text_input(
-            chat.payload
+def _reject_text_input(text: str, chat: ChatData, conn: psycopg.Connection) -> TemplateMessage:
+    return msg.users.settings.invalid_text_input(chat.render_context())
+
+
+chat_machine.register(
+    ChatType.USER_SETTINGS.value,
+    {
+        UserSettingsSteps.SELECT_OPTION.value: Step(
+            text=_process_selected_option, to=(UserSettingsSteps.SELECT_NEW_TIME_SLOT.value,)
         ),
-    }
-    handler = handlers.get(chat.current_step)
-    if handler:
-        return handler(text, chat, conn)
-    raise InvalidStepError(f"Invalid step in handle_user_settings_chat: {chat.current_step}")
+        UserSettingsSteps.SELECT_NEW_TIME_SLOT.value: Step(
+            text=_reject_text_input, postback=_process_new_time_slot_selection
+        ),
+    },
+)
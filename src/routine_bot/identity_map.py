@@ -0,0 +1,70 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from routine_bot.invalidation import invalidation_bus
+from routine_bot.models import EventData, UserData
+
+
+class IdentityMap:
+    """
+    Rows read during the handling of one LINE event, so repeated reads of the same user or event hit memory.
+
+    Only found rows are kept. Writes evict the affected rows through the invalidation bus, which runs the local
+    evictions in the writer's context, so a read after a write in the same request goes back to the database.
+    """
+
+    def __init__(self) -> None:
+        self._users: dict[str, UserData] = {}
+        self._events: dict[str, EventData] = {}
+
+    def get_user(self, user_id: str) -> UserData | None:
+        return self._users.get(user_id)
+
+    def add_user(self, user: UserData) -> None:
+        self._users[user.user_id] = user
+
+    def get_event(self, event_id: str) -> EventData | None:
+        return self._events.get(event_id)
+
+    def add_event(self, event: EventData) -> None:
+        self._events[event.event_id] = event
+
+    def discard_user(self, user_id: str) -> None:
+        self._users.pop(user_id, None)
+
+    def discard_event(self, event_id: str) -> None:
+        self._events.pop(event_id, None)
+
+
+_current_identity_map: ContextVar[IdentityMap | None] = ContextVar("identity_map", default=None)
+
+
+def current_identity_map() -> IdentityMap | None:
+    return _current_identity_map.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[IdentityMap]:
+    identity_map = IdentityMap()
+    token = _current_identity_map.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _current_identity_map.reset(token)
+
+
+def _discard_user(user_id: str) -> None:
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        identity_map.discard_user(user_id)
+
+
+def _discard_event(event_id: str) -> None:
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        identity_map.discard_event(event_id)
+
+
+invalidation_bus.subscribe("user", _discard_user)
+invalidation_bus.subscribe("event", _discard_event)
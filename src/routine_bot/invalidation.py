@@ -0,0 +1,115 @@
+import logging
+import threading
+import uuid
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+import psycopg
+from psycopg import sql
+
+from routine_bot.constants import CACHE_INVALIDATION_ENABLED, DATABASE_URL
+from routine_bot.logger import format_logger_name
+
+logger = logging.getLogger(format_logger_name(__name__))
+
+CHANNEL = "cache_invalidation"
+# NOTIFY payloads must stay under 8000 bytes, batches are split below this
+MAX_PAYLOAD_BYTES = 7000
+
+
+class InvalidationBus:
+    """
+    Fan-out of cache evictions across processes over Postgres LISTEN/NOTIFY.
+
+    Caches subscribe an evict callback per entity kind ("event", "user") and a clear callback. `publish` evicts
+    in this process right away and, when enabled, sends a NOTIFY on the writer's connection, which Postgres only
+    delivers once the transaction commits. `publish_many` sends the keys of one kind as comma-separated payloads,
+    so a bulk write costs one round trip per ~7 kB of keys rather than one per key. Every process runs one
+    listener connection that applies the evictions of the others. Notifications sent while the listener is
+    disconnected are lost, so every cache is cleared whenever it (re)connects.
+    """
+
+    def __init__(self) -> None:
+        self._origin = uuid.uuid4().hex[:8]
+        self._evictors: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+        self._clearers: list[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, kind: str, evict: Callable[[str], None]) -> None:
+        self._evictors[kind].append(evict)
+
+    def subscribe_clear(self, clear: Callable[[], None]) -> None:
+        self._clearers.append(clear)
+
+    def _evict(self, kind: str, key: str) -> None:
+        for evict in self._evictors.get(kind, ()):
+            evict(key)
+
+    def _clear(self) -> None:
+        for clear in self._clearers:
+            clear()
+
+    def publish(self, kind: str, key: str, conn: psycopg.Connection) -> None:
+        self.publish_many(kind, [key], conn)
+
+    def publish_many(self, kind: str, keys: Iterable[str], conn: psycopg.Connection) -> None:
+        keys = list(keys)
+        for key in keys:
+            self._evict(kind, key)
+        if not CACHE_INVALIDATION_ENABLED or not keys:
+            return
+        prefix = f"{self._origin}:{kind}:"
+        batch: list[str] = []
+        size = len(prefix)
+        for key in keys:
+            if batch and size + len(key) + 1 > MAX_PAYLOAD_BYTES:
+                conn.execute("SELECT pg_notify(%s, %s)", (CHANNEL, prefix + ",".join(batch)))
+                batch, size = [], len(prefix)
+            batch.append(key)
+            size += len(key) + 1
+        conn.execute("SELECT pg_notify(%s, %s)", (CHANNEL, prefix + ",".join(batch)))
+
+    def _handle(self, payload: str) -> None:
+        try:
+            origin, kind, keys = payload.split(":", 2)
+        except ValueError:
+            logger.warning(f"Malformed invalidation payload: {payload!r}")
+            return
+        if origin == self._origin:
+            return
+        for key in keys.split(","):
+            self._evict(kind, key)
+
+    def _listen(self, retry_seconds: float) -> None:
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(conninfo=DATABASE_URL, autocommit=True) as conn:
+                    conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(CHANNEL)))
+                    self._clear()
+                    logger.info(f"Listening for cache invalidations: origin={self._origin}")
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=retry_seconds):
+                            try:
+                                self._handle(notify.payload)
+                            except Exception:
+                                logger.exception(f"Failed to apply invalidation: {notify.payload!r}")
+            except Exception:
+                # anything escaping the per-message handler means the connection state is unknown, so reconnect,
+                # which clears every cache as notifications may have been missed
+                logger.warning("Invalidation listener disconnected, retrying", exc_info=True)
+                self._stop.wait(retry_seconds)
+
+    def start(self, retry_seconds: float = 5.0) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._listen, args=(retry_seconds,), name="invalidation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+invalidation_bus = InvalidationBus()
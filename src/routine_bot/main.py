@@ -3,8 +3,10 @@ import logging
 import psycopg
 from fastapi import FastAPI
 
-from routine_bot.constants import DATABASE_URL
+from routine_bot.constants import CACHE_INVALIDATION_ENABLED, DATABASE_URL, REMINDER_INDEX_ENABLED
 from routine_bot.db.init import init_db
+from routine_bot.db.reminder_queue import load_reminder_index
+from routine_bot.invalidation import invalidation_bus
 from routine_bot.logger import format_logger_name, setup_logging
 from routine_bot.routers import router
 
@@ -14,6 +16,13 @@ logger = logging.getLogger(format_logger_name(__name__))
 
 with psycopg.connect(conninfo=DATABASE_URL) as conn:
     init_db(conn)
+    if REMINDER_INDEX_ENABLED:
+        load_reminder_index(conn)
+        if not CACHE_INVALIDATION_ENABLED:
+            logger.warning("Reminder index enabled without cache invalidation, other workers' writes are not seen")
+
+if CACHE_INVALIDATION_ENABLED:
+    invalidation_bus.start()
 
 app = FastAPI()
 app.include_router(router)
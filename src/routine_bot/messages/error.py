@@ -1,4 +1,4 @@
-from linebot.v3.messaging import FlexMessage
+from linebot.v3.messaging import FlexMessage, MessageAction, QuickReply, QuickReplyItem
 
 from routine_bot.messages.utils import flex_bubble_template
 
@@ -16,8 +16,17 @@ def event_name_duplicated(event_name: str) -> FlexMessage:
     return error([f"💭 已經有叫做［{event_name}］的事項囉", "🍞 再想一個新名字試試吧"])
 
 
-def event_name_not_found(event_name: str) -> FlexMessage:
-    return error([f"💭 嗯？好像沒有叫做［{event_name}］的事項喔", "🍞 再試一次看看吧"])
+def event_name_not_found(event_name: str, suggestions: list[str] | None = None) -> FlexMessage:
+    if not suggestions:
+        return error([f"💭 嗯？好像沒有叫做［{event_name}］的事項喔", "🍞 再試一次看看吧"])
+    msg = error([f"💭 嗯？好像沒有叫做［{event_name}］的事項喔", "🍞 是不是下面這些呢？點一下就可以選擇喔"])
+    items = [QuickReplyItem(action=MessageAction(label=name, text=name)) for name in suggestions]
+    msg.quick_reply = QuickReply(items=items)
+    return msg
+
+
+def picked_event_not_found() -> FlexMessage:
+    return error(["💭 嗯？這個事項好像已經不在了", "🍞 再輸入一次事項名稱看看吧"])
 
 
 def event_name_too_long() -> FlexMessage:
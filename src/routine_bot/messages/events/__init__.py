@@ -6,4 +6,5 @@ from . import new as new
 from . import receive as receive
 from . import revoke as revoke
 from . import share as share
+from . import stats as stats
 from . import view_all as view_all
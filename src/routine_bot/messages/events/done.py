@@ -12,9 +12,12 @@ from routine_bot.enums.command import Command
 from routine_bot.messages.utils import flex_bubble_template
 
 
-def enter_event_name() -> FlexMessage:
-    bubble = flex_bubble_template(title="🍞 新增完成紀錄", lines=["📝 請輸入要新增完成紀錄的事項名稱"])
-    return FlexMessage(altText="📝 請輸入要新增完成紀錄的事項名稱", contents=bubble)
+def enter_event_name(picker: QuickReply | None = None) -> FlexMessage:
+    lines = ["📝 請輸入要新增完成紀錄的事項名稱"]
+    if picker is not None:
+        lines.append("⬇️ 也可以直接點選下方的事項")
+    bubble = flex_bubble_template(title="🍞 新增完成紀錄", lines=lines)
+    return FlexMessage(altText="📝 請輸入要新增完成紀錄的事項名稱", contents=bubble, quickReply=picker)
 
 
 def select_done_at(chat_payload: dict[str, str]) -> TemplateMessage:
@@ -22,14 +22,15 @@ class FindEventSteps(StrEnum):
     INPUT_NAME = auto()
 
 
-def enter_event_name() -> FlexMessage:
-    bubble = flex_bubble_template(
-        title="🍞 查詢事項", lines=["📝 請輸入要查詢的事項名稱", "❗ 只能查詢由自己新增的事項哦"]
-    )
-    return FlexMessage(altText="📝 請輸入要查詢的事項名稱", contents=bubble)
+def enter_event_name(picker: QuickReply | None = None) -> FlexMessage:
+    lines = ["📝 請輸入要查詢的事項名稱", "❗ 只能查詢由自己新增的事項哦"]
+    if picker is not None:
+        lines.append("⬇️ 也可以直接點選下方的事項")
+    bubble = flex_bubble_template(title="🍞 查詢事項", lines=lines)
+    return FlexMessage(altText="📝 請輸入要查詢的事項名稱", contents=bubble, quickReply=picker)
 
 
-def format_event_info(chat_payload: dict[str, str]) -> FlexMessage:
+def format_event_info(chat_payload: dict[str, str], recent_records: list[str]) -> FlexMessage:
     contents = [
         flex_text_bold_line(f"🍞［{chat_payload['event_name']}］的摘要"),
         FlexSeparator(),
@@ -41,11 +42,13 @@ def format_event_info(chat_payload: dict[str, str]) -> FlexMessage:
     else:
         contents.append(flex_text_normal_line("🔕 提醒設定：關閉"))
 
+    contents.append(flex_text_normal_line(f"✅ 累計完成：{chat_payload['record_count']} 次"))
+
     contents.append(FlexSeparator())
     contents.append(flex_text_bold_line("🗓 最近紀錄"))
 
-    if chat_payload["recent_records"]:
-        for record in chat_payload["recent_records"]:
+    if recent_records:
+        for record in recent_records:
             contents.append(flex_text_normal_line(f"✅ {record}"))
     else:
         contents.append(flex_text_normal_line("👀 目前還沒有任何紀錄"))
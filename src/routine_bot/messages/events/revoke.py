@@ -1,5 +1,3 @@
-import ast
-
 from linebot.v3.messaging import (
     ButtonsTemplate,
     FlexMessage,
@@ -13,9 +11,12 @@ from routine_bot.enums.command import Command
 from routine_bot.messages.utils import flex_bubble_template
 
 
-def enter_event_name() -> FlexMessage:
-    bubble = flex_bubble_template(title="🍞 取消分享事項", lines=["📝 請輸入要取消分享的事項名稱"])
-    return FlexMessage(altText="📝 請輸入要取消分享的事項名稱", contents=bubble)
+def enter_event_name(picker: QuickReply | None = None) -> FlexMessage:
+    lines = ["📝 請輸入要取消分享的事項名稱"]
+    if picker is not None:
+        lines.append("⬇️ 也可以直接點選下方的事項")
+    bubble = flex_bubble_template(title="🍞 取消分享事項", lines=lines)
+    return FlexMessage(altText="📝 請輸入要取消分享的事項名稱", contents=bubble, quickReply=picker)
 
 
 def no_recipient(chat_payload: dict[str, str]) -> FlexMessage:
@@ -25,9 +26,8 @@ def no_recipient(chat_payload: dict[str, str]) -> FlexMessage:
     return FlexMessage(altText=f"⚠️ 目前事項［{chat_payload['event_name']}］沒有設定任何分享對象", contents=bubble)
 
 
-def select_recipient(chat_payload: dict[str, str]) -> TemplateMessage:
-    recipient_info = ast.literal_eval(chat_payload["recipient_info"])
-    buttons = [MessageAction(label=f"{name}", text=f"{name}") for name in recipient_info.keys()]
+def select_recipient(chat_payload: dict[str, str], recipient_names: list[str]) -> TemplateMessage:
+    buttons = [MessageAction(label=f"{name}", text=f"{name}") for name in recipient_names]
     template = ButtonsTemplate(
         title=f"🍞 取消分享［{chat_payload['event_name']}］",
         text="\n💭 目前事項的分享對象如下\n\n✨ 請選擇你想要取消分享權限的對象～",
@@ -37,9 +37,8 @@ def select_recipient(chat_payload: dict[str, str]) -> TemplateMessage:
     return msg
 
 
-def recipient_not_found(chat_payload: dict[str, str]) -> TemplateMessage:
-    recipient_info = ast.literal_eval(chat_payload["recipient_info"])
-    buttons = [MessageAction(label=f"{name}", text=f"{name}") for name in recipient_info.keys()]
+def recipient_not_found(chat_payload: dict[str, str], recipient_names: list[str]) -> TemplateMessage:
+    buttons = [MessageAction(label=f"{name}", text=f"{name}") for name in recipient_names]
     template = ButtonsTemplate(
         title=f"🍞 取消分享［{chat_payload['event_name']}］",
         text="\n⚠️ 嗯？你提供的使用者似乎不在目前的分享對象中\n\n✨ 請從下方按鈕選擇你想要取消分享權限的對象～",
@@ -0,0 +1,64 @@
+from linebot.v3.messaging import (
+    FlexBox,
+    FlexBubble,
+    FlexMessage,
+    FlexSeparator,
+    MessageAction,
+    QuickReply,
+    QuickReplyItem,
+)
+
+from routine_bot.enums.command import Command
+from routine_bot.messages.utils import flex_text_bold_line, flex_text_normal_line
+from routine_bot.models import EventStatsData
+
+
+def format_event_stats(event_stats: list[EventStatsData]) -> FlexMessage:
+    if not event_stats:
+        contents = [
+            flex_text_bold_line("👀 目前沒有任何事項"),
+            FlexSeparator(),
+            flex_text_normal_line("🍞 現在就來新增一筆紀錄吧！"),
+        ]
+        alt_text = "📊 完成統計｜目前沒有任何紀錄 🍞"
+    else:
+        contents = [
+            flex_text_bold_line("📊 完成統計"),
+            FlexSeparator(),
+        ]
+        for i, stats in enumerate(event_stats):
+            contents.append(flex_text_bold_line(f"🍞 {stats.event_name}"))
+            contents.append(flex_text_normal_line(f"✅ 累計完成：{stats.completion_count} 次"))
+            contents.append(
+                flex_text_normal_line(f"🔥 連續準時：{stats.current_streak} 次（最長 {stats.longest_streak} 次）")
+            )
+            if stats.average_interval_days is not None:
+                contents.append(flex_text_normal_line(f"⏳ 平均間隔：{stats.average_interval_days:.1f} 天"))
+            if stats.on_time_rate is not None:
+                contents.append(flex_text_normal_line(f"🎯 準時率：{stats.on_time_rate:.0%}"))
+            if i != len(event_stats) - 1:
+                contents.append(FlexSeparator())
+        alt_text = f"📊 完成統計｜共 {len(event_stats)} 個事項 🍞"
+
+    bubble = FlexBubble(
+        body=FlexBox(
+            layout="vertical",
+            paddingTop="lg",
+            paddingBottom="lg",
+            paddingStart="xl",
+            paddingEnd="xl",
+            spacing="lg",
+            contents=contents,
+        ),
+    )
+    msg = FlexMessage(
+        altText=alt_text,
+        contents=bubble,
+        quickReply=QuickReply(
+            items=[
+                QuickReplyItem(action=MessageAction(label="更新完成紀錄", text=Command.DONE.value)),
+                QuickReplyItem(action=MessageAction(label="指令表", text=Command.MENU.value)),
+            ]
+        ),
+    )
+    return msg
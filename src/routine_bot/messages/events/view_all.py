@@ -1,5 +1,3 @@
-import ast
-
 from linebot.v3.messaging import (
     FlexBox,
     FlexBubble,
@@ -12,10 +10,10 @@ from linebot.v3.messaging import (
 
 from routine_bot.enums.command import Command
 from routine_bot.messages.utils import flex_text_bold_line, flex_text_normal_line
+from routine_bot.models import EventSummaryLine
 
 
-def format_all_events_summary(chat_payload: dict[str, str]) -> FlexMessage:
-    event_summaries = ast.literal_eval(chat_payload["event_summaries"])
+def format_all_events_summary(event_summaries: list[EventSummaryLine]) -> FlexMessage:
     if not event_summaries:
         contents = [
             flex_text_bold_line("👀 目前沒有任何事項"),
@@ -31,12 +29,12 @@ def format_all_events_summary(chat_payload: dict[str, str]) -> FlexMessage:
             FlexSeparator(),
         ]
         for i, event_summary in enumerate(event_summaries):
-            contents.append(flex_text_bold_line(f"🍞 {event_summary['event_name']}"))
-            if event_summary["owner_name"]:
-                contents.append(flex_text_normal_line(f"👥 來自：{event_summary['owner_name']}"))
-            contents.append(flex_text_normal_line(f"🗓 上次是：{event_summary['time_diff']}"))
-            if event_summary["next_reminder"]:
-                contents.append(flex_text_normal_line(f"🔔 下次提醒：{event_summary['next_reminder']}"))
+            contents.append(flex_text_bold_line(f"🍞 {event_summary.event_name}"))
+            if event_summary.owner_name:
+                contents.append(flex_text_normal_line(f"👥 來自：{event_summary.owner_name}"))
+            contents.append(flex_text_normal_line(f"🗓 上次是：{event_summary.time_diff}"))
+            if event_summary.next_reminder is not None:
+                contents.append(flex_text_normal_line(f"🔔 下次提醒：{event_summary.next_reminder:%Y-%m-%d}"))
             else:
                 contents.append(flex_text_normal_line("🔕 提醒設定：關閉"))
             if i != len(event_summaries) - 1:
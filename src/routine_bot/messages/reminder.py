@@ -1,9 +1,27 @@
-from linebot.v3.messaging import FlexMessage
+from urllib.parse import urlencode
+
+from linebot.v3.messaging import FlexBox, FlexBubble, FlexButton, FlexMessage, PostbackAction
 
 from routine_bot.constants import FREE_PLAN_MAX_EVENTS
 from routine_bot.messages.utils import flex_bubble_template
 
 
+def _with_event_actions(bubble: FlexBubble, payload: dict[str, str]) -> FlexBubble:
+    done_data = urlencode({"action": "done", "event_id": payload["event_id"], "sig": payload["done_sig"]})
+    bubble.footer = FlexBox(
+        layout="horizontal",
+        spacing="md",
+        contents=[
+            FlexButton(
+                action=PostbackAction(label="今天完成了", data=done_data, displayText="今天完成了！"),
+                style="primary",
+                height="sm",
+            ),
+        ],
+    )
+    return bubble
+
+
 def user_owned_event(payload: dict[str, str]) -> FlexMessage:
     title = f"🍞 又該{payload['event_name']}囉～"
     lines = [
@@ -14,7 +32,7 @@ def user_owned_event(payload: dict[str, str]) -> FlexMessage:
         lines.append(f"🔔 原定時間：{payload['time_diff']}")
         lines.append(f"⏳ 已延後：{payload['time_diff'][:-1]}")
 
-    bubble = flex_bubble_template(title=title, lines=lines)
+    bubble = _with_event_actions(flex_bubble_template(title=title, lines=lines), payload)
     msg = FlexMessage(altText=title, contents=bubble)
     return msg
 
@@ -50,3 +68,17 @@ def reminder_disabled() -> FlexMessage:
         contents=bubble,
     )
     return msg
+
+
+def already_done_today(payload: dict[str, str]) -> FlexMessage:
+    bubble = flex_bubble_template(
+        title="✅ 今天已經完成過囉～", lines=[f"🍞 事項：{payload['event_name']}", "💭 不用再記一次啦"]
+    )
+    return FlexMessage(altText=f"✅［{payload['event_name']}］今天已經完成過囉", contents=bubble)
+
+
+def action_unavailable() -> FlexMessage:
+    bubble = flex_bubble_template(
+        title="💭 這個提醒已經失效了", lines=["🍞 事項可能已被刪除或取消分享", "📝 可以改用 /done 來記錄喔"]
+    )
+    return FlexMessage(altText="💭 這個提醒已經失效了", contents=bubble)
@@ -19,6 +19,7 @@ def format_help():
             f"{Command.SHARE.value} ➜ 與其他用戶共享事項",
             f"{Command.REVOKE.value} ➜ 取消用戶的共享權限",
             f"{Command.VIEW_ALL.value} ➜ 瀏覽目前所有記得的事項",
+            f"{Command.STATS.value} ➜ 查看事項的完成統計",
             "🧭 其他功能",
             f"{Command.ABORT.value} ➜ 取消目前進行中的操作",
             f"{Command.SETTINGS.value} ➜ 編輯設定",
@@ -12,6 +12,7 @@ items = [
     QuickReplyItem(action=MessageAction(label="共享事項", text=Command.SHARE.value)),
     QuickReplyItem(action=MessageAction(label="取消共享", text=Command.REVOKE.value)),
     QuickReplyItem(action=MessageAction(label="瀏覽所有事項", text=Command.VIEW_ALL.value)),
+    QuickReplyItem(action=MessageAction(label="完成統計", text=Command.STATS.value)),
     QuickReplyItem(action=MessageAction(label="編輯設定", text=Command.SETTINGS.value)),
     QuickReplyItem(action=MessageAction(label="使用說明", text=Command.HELP.value)),
 ]
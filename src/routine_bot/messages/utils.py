@@ -1,5 +1,14 @@
+from urllib.parse import urlencode
 
-from linebot.v3.messaging import FlexBox, FlexBubble, FlexSeparator, FlexText
+from linebot.v3.messaging import (
+    FlexBox,
+    FlexBubble,
+    FlexSeparator,
+    FlexText,
+    PostbackAction,
+    QuickReply,
+    QuickReplyItem,
+)
 
 
 def flex_text_bold_line(text: str) -> FlexText:
@@ -27,3 +36,29 @@ def flex_bubble_template(title: str, lines: list[str]) -> FlexBubble:
         ),
     )
     return bubble
+
+
+def event_picker(chat_id: str, event_choices: list[tuple[str, str]], page: int, has_more: bool) -> QuickReply | None:
+    if not event_choices:
+        return None
+    items = [
+        QuickReplyItem(
+            action=PostbackAction(
+                label=event_name,
+                data=urlencode({"chat_id": chat_id, "event_id": event_id}),
+                displayText=event_name,
+            )
+        )
+        for event_id, event_name in event_choices
+    ]
+    if has_more:
+        items.append(
+            QuickReplyItem(
+                action=PostbackAction(
+                    label="更多事項 ➡️",
+                    data=urlencode({"chat_id": chat_id, "page": page + 1}),
+                    displayText="更多事項",
+                )
+            )
+        )
+    return QuickReply(items=items)
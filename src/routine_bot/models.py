@@ -1,10 +1,10 @@
 from dataclasses import dataclass
-from datetime import datetime, time
+from datetime import date, datetime, time
 
 from routine_bot.constants import FREE_PLAN_MAX_EVENTS, TZ_TAIPEI
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class UserData:
     user_id: str
     event_count: int
@@ -26,7 +26,7 @@ class UserData:
         return self.exceeded_free_plan_max_events and not self.has_premium_access
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatData:
     chat_id: str
     user_id: str
@@ -35,33 +35,109 @@ class ChatData:
     payload: dict[str, str]
     status: str
 
+    def render_context(self, **render_data: str) -> dict[str, str]:
+        """
+        The payload, which holds what later steps need, plus the data only needed to render this turn's reply.
 
-@dataclass
+        The render data is never persisted.
+        """
+        return {**self.payload, "chat_id": self.chat_id, **render_data}
+
+
+@dataclass(slots=True, frozen=True)
 class EventData:
     event_id: str
     user_id: str
     event_name: str
     reminder_enabled: bool
     event_cycle: str | None
-    last_done_at: datetime
-    next_due_at: datetime | None
+    last_done_at: date
+    next_due_at: date | None
     share_count: int
     is_active: bool
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class EventSummaryData:
+    event_id: str
+    user_id: str
+    event_name: str
+    reminder_enabled: bool
+    last_done_at: date
+    next_due_at: date | None
+    owner_name: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class EventSummaryLine:
+    event_name: str
+    owner_name: str | None
+    time_diff: str
+    next_reminder: date | None
+
+
+@dataclass(slots=True, frozen=True)
+class EventDetailData:
+    event_id: str
+    user_id: str
+    event_name: str
+    reminder_enabled: bool
+    event_cycle: str | None
+    last_done_at: date
+    next_due_at: date | None
+    recent_records: list[date]
+    record_count: int
+
+
+@dataclass(slots=True, frozen=True)
 class RecordData:
     record_id: str
     event_id: str
     event_name: str
     user_id: str
-    done_at: datetime
+    done_at: date
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ShareData:
     share_id: str
     event_id: str
     event_name: str
     owner_id: str
     recipient_id: str
+
+
+@dataclass(slots=True, frozen=True)
+class ReminderData:
+    recipient_id: str
+    event_id: str
+    owner_id: str
+    event_name: str
+    event_cycle: str | None
+    last_done_at: date
+    next_due_at: date
+
+
+@dataclass(slots=True, frozen=True)
+class EventStatsData:
+    event_id: str
+    event_name: str
+    event_cycle: str | None
+    completion_count: int
+    interval_count: int
+    interval_days_sum: int
+    on_time_count: int
+    current_streak: int
+    longest_streak: int
+
+    @property
+    def average_interval_days(self) -> float | None:
+        if not self.interval_count:
+            return None
+        return self.interval_days_sum / self.interval_count
+
+    @property
+    def on_time_rate(self) -> float | None:
+        if self.event_cycle is None or not self.interval_count:
+            return None
+        return self.on_time_count / self.interval_count
@@ -0,0 +1,74 @@
+import threading
+
+from cachetools import LRUCache
+
+from routine_bot.invalidation import invalidation_bus
+
+
+class _EventNameCache(LRUCache):
+    def __init__(self, maxsize: int, users_by_event: dict[str, str]) -> None:
+        super().__init__(maxsize)
+        self._users_by_event = users_by_event
+
+    def popitem(self):
+        user_id, event_ids = super().popitem()
+        for event_id in event_ids.values():
+            self._users_by_event.pop(event_id, None)
+        return user_id, event_ids
+
+
+class EventNameIndex:
+    """
+    In-process map from event name to event id of each user's owned events, loaded lazily per user.
+
+    A loaded user can be answered without a query, including "not found". Creating an event evicts by user, and
+    renaming or deleting one evicts by event, through the invalidation bus. Local evictions happen when the
+    statement runs, not when the transaction commits, so a map reloaded by a concurrent request in between can
+    miss the change until the next eviction. The least recently used users are dropped beyond `maxsize`.
+    """
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self._lock = threading.Lock()
+        # event_id -> user_id, to evict by event
+        self._users_by_event: dict[str, str] = {}
+        self._event_ids: _EventNameCache = _EventNameCache(maxsize, self._users_by_event)
+
+    def __len__(self) -> int:
+        return len(self._event_ids)
+
+    def get(self, user_id: str) -> dict[str, str] | None:
+        with self._lock:
+            return self._event_ids.get(user_id)
+
+    def put(self, user_id: str, event_ids: dict[str, str]) -> None:
+        with self._lock:
+            self._remove(user_id)
+            self._event_ids[user_id] = event_ids
+            for event_id in event_ids.values():
+                self._users_by_event[event_id] = user_id
+
+    def _remove(self, user_id: str) -> None:
+        event_ids = self._event_ids.pop(user_id, None)
+        for event_id in (event_ids or {}).values():
+            self._users_by_event.pop(event_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._event_ids.clear()
+            self._users_by_event.clear()
+
+    def discard_user(self, user_id: str) -> None:
+        with self._lock:
+            self._remove(user_id)
+
+    def discard_event(self, event_id: str) -> None:
+        with self._lock:
+            user_id = self._users_by_event.get(event_id)
+            if user_id is not None:
+                self._remove(user_id)
+
+
+event_name_index = EventNameIndex()
+invalidation_bus.subscribe("event", event_name_index.discard_event)
+invalidation_bus.subscribe("user", event_name_index.discard_user)
+invalidation_bus.subscribe_clear(event_name_index.clear)
@@ -0,0 +1,190 @@
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, time
+
+from routine_bot.invalidation import invalidation_bus
+from routine_bot.logger import format_logger_name
+
+logger = logging.getLogger(format_logger_name(__name__))
+
+ReminderEntry = tuple[time, date, str, str]
+
+
+class ReminderIndex:
+    """
+    In-process mirror of the `reminder_queue` table, bucketed by (time slot, due date).
+
+    The index stays empty and ignores updates until `load` is called, so the mutation functions in `db/` can
+    report every change unconditionally. Updates are applied when the statement runs, not when the transaction
+    commits, so a rolled back write leaves drift behind until the next consistency check reloads the index.
+
+    Writes made by other processes arrive as evictions on the invalidation bus, which only mark the event or
+    recipient as stale. The sender calls `refresh_reminder_index` in `db/reminder_queue.py` before reading the
+    index, which reloads the stale rows from `reminder_queue`, or the whole index after the listener reconnected.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loaded = False
+        # time slot -> due date -> {(recipient_id, event_id)}
+        self._wheel: dict[time, dict[date, set[tuple[str, str]]]] = defaultdict(lambda: defaultdict(set))
+        # event_id -> recipient_id -> (time slot, due date)
+        self._entries: dict[str, dict[str, tuple[time, date]]] = defaultdict(dict)
+        self._events_by_recipient: dict[str, set[str]] = defaultdict(set)
+        # key -> generation it was marked at, so a refresh only unmarks keys not marked again while it ran
+        self._stale_events: dict[str, int] = {}
+        self._stale_recipients: dict[str, int] = {}
+        self._reload_needed = False
+        self._generation = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return sum(len(recipients) for recipients in self._entries.values())
+
+    def _add(self, time_slot: time, due_date: date, recipient_id: str, event_id: str) -> None:
+        self._wheel[time_slot][due_date].add((recipient_id, event_id))
+        self._entries[event_id][recipient_id] = (time_slot, due_date)
+        self._events_by_recipient[recipient_id].add(event_id)
+
+    def _remove(self, recipient_id: str, event_id: str) -> None:
+        recipients = self._entries.get(event_id)
+        if not recipients or recipient_id not in recipients:
+            return
+        time_slot, due_date = recipients.pop(recipient_id)
+        if not recipients:
+            del self._entries[event_id]
+        bucket = self._wheel[time_slot][due_date]
+        bucket.discard((recipient_id, event_id))
+        if not bucket:
+            del self._wheel[time_slot][due_date]
+        events = self._events_by_recipient[recipient_id]
+        events.discard(event_id)
+        if not events:
+            del self._events_by_recipient[recipient_id]
+
+    def load(self, entries: Iterable[ReminderEntry]) -> None:
+        with self._lock:
+            self._wheel.clear()
+            self._entries.clear()
+            self._events_by_recipient.clear()
+            for time_slot, due_date, recipient_id, event_id in entries:
+                self._add(time_slot, due_date, recipient_id, event_id)
+            self._loaded = True
+            self._reload_needed = False
+            self._stale_events.clear()
+            self._stale_recipients.clear()
+        logger.info(f"Reminder index loaded: {len(self)} entries")
+
+    def set_event(self, event_id: str, entries: Iterable[tuple[time, date, str]]) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            for recipient_id in list(self._entries.get(event_id, {})):
+                self._remove(recipient_id, event_id)
+            for time_slot, due_date, recipient_id in entries:
+                self._add(time_slot, due_date, recipient_id, event_id)
+
+    def discard_event(self, event_id: str) -> None:
+        self.set_event(event_id, [])
+
+    def discard_recipient(self, event_id: str, recipient_id: str) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(recipient_id, event_id)
+
+    def move_recipient(self, recipient_id: str, time_slot: time) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            for event_id in list(self._events_by_recipient.get(recipient_id, ())):
+                _, due_date = self._entries[event_id][recipient_id]
+                self._remove(recipient_id, event_id)
+                self._add(time_slot, due_date, recipient_id, event_id)
+
+    def mark_event_stale(self, event_id: str) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._generation += 1
+            self._stale_events[event_id] = self._generation
+
+    def mark_recipient_stale(self, recipient_id: str) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._generation += 1
+            self._stale_recipients[recipient_id] = self._generation
+
+    def mark_all_stale(self) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._reload_needed = True
+
+    def stale(self) -> tuple[bool, dict[str, int], dict[str, int]]:
+        """
+        Return whether the whole index needs a reload, and the stale events and recipients with their generations.
+        """
+        with self._lock:
+            return self._reload_needed, dict(self._stale_events), dict(self._stale_recipients)
+
+    def refresh(
+        self, stale_events: dict[str, int], stale_recipients: dict[str, int], entries: Iterable[ReminderEntry]
+    ) -> None:
+        """
+        Replace the entries of the given events and recipients with the ones read from the database.
+
+        `entries` must hold every queue row of those events and recipients. Keys marked again since `stale` was
+        called stay stale for the next refresh.
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            for event_id in stale_events:
+                for recipient_id in list(self._entries.get(event_id, {})):
+                    self._remove(recipient_id, event_id)
+            for recipient_id in stale_recipients:
+                for event_id in list(self._events_by_recipient.get(recipient_id, ())):
+                    self._remove(recipient_id, event_id)
+            for time_slot, due_date, recipient_id, event_id in entries:
+                self._remove(recipient_id, event_id)
+                self._add(time_slot, due_date, recipient_id, event_id)
+            for stale, marked in ((self._stale_events, stale_events), (self._stale_recipients, stale_recipients)):
+                for key, generation in marked.items():
+                    if stale.get(key) == generation:
+                        del stale[key]
+
+    def due(self, time_slot: time, today: date) -> list[tuple[str, str]]:
+        """
+        Return the (recipient_id, event_id) pairs of `time_slot` that are due on or before `today`.
+        """
+        with self._lock:
+            buckets = self._wheel.get(time_slot, {})
+            return [key for due_date, bucket in buckets.items() if due_date <= today for key in bucket]
+
+    def diff(self, entries: Iterable[ReminderEntry]) -> tuple[set[ReminderEntry], set[ReminderEntry]]:
+        """
+        Compare the index against the given database entries.
+
+        Returns the entries missing from the index and the stale entries the database no longer has.
+        """
+        expected = set(entries)
+        with self._lock:
+            actual = {
+                (time_slot, due_date, recipient_id, event_id)
+                for event_id, recipients in self._entries.items()
+                for recipient_id, (time_slot, due_date) in recipients.items()
+            }
+        return expected - actual, actual - expected
+
+
+reminder_index = ReminderIndex()
+invalidation_bus.subscribe("event", reminder_index.mark_event_stale)
+invalidation_bus.subscribe("user", reminder_index.mark_recipient_stale)
+invalidation_bus.subscribe_clear(reminder_index.mark_all_stale)
@@ -1,7 +1,7 @@
 import json
 import logging
 import time
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 
 import psycopg
 from fastapi import APIRouter, HTTPException, Request, status
@@ -9,12 +9,25 @@ from fastapi.responses import Response
 from linebot.v3.exceptions import InvalidSignatureError
 from linebot.v3.messaging import ApiClient, MessagingApi, PushMessageRequest
 
+import routine_bot.db.chats as chat_db
+import routine_bot.db.events as event_db
+import routine_bot.db.records as record_db
+import routine_bot.db.reminder_queue as reminder_queue_db
 import routine_bot.db.users as user_db
 import routine_bot.messages as msg
-from routine_bot.constants import DATABASE_URL, ENV, SENDER_TOKEN, TZ_TAIPEI
+from routine_bot.constants import (
+    CHAT_ARCHIVE_ENABLED,
+    CHAT_ONGOING_TTL_HOURS,
+    CHAT_RETENTION_DAYS,
+    DATABASE_URL,
+    ENV,
+    SENDER_TOKEN,
+    TZ_TAIPEI,
+)
 from routine_bot.handlers.main import configuration, handler
-from routine_bot.handlers.reminder import send_reminders_for_shared_events, send_reminders_for_user_owned_events
+from routine_bot.handlers.reminder import send_shared_event_reminder, send_user_owned_event_reminder
 from routine_bot.logger import add_context, format_logger_name, indent
+from routine_bot.reminder_index import reminder_index
 
 logger = logging.getLogger(format_logger_name(__name__))
 
@@ -55,8 +68,7 @@ async def webhook(request: Request):
     return Response(status_code=status.HTTP_200_OK)
 
 
-@router.post("/reminder/send")
-async def send_reminder(request: Request):
+def _verify_sender_token(request: Request) -> None:
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(
@@ -67,6 +79,11 @@ async def send_reminder(request: Request):
     if token != SENDER_TOKEN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token")
 
+
+@router.post("/reminder/send")
+async def send_reminder(request: Request):
+    _verify_sender_token(request)
+
     logger.info("Starting the reminder sending process")
     start_time = time.perf_counter()
     execution_start = datetime.now(UTC)
@@ -78,24 +95,39 @@ async def send_reminder(request: Request):
             line_bot_api = MessagingApi(api_client)
             time_slot = datetime.now(TZ_TAIPEI).replace(minute=0, second=0, microsecond=0).time()
             logger.info(f"Current time slot: {time_slot.strftime('%H:%M')}")
-            users = user_db.list_active_users_by_time_slot(time_slot, conn)
-            logger.info(f"Users found in this time slot: {len(users)}")
-            limited_users = 0
-            user_owned_events = 0
-            shared_events = 0
-            for user in users:
-                cxt_logger = add_context(logger, user_id=user.user_id)
-                cxt_logger.info("Sending reminders")
+            all_users = 0
+            limited_user_ids = set()
+            for user in user_db.iter_active_users_by_time_slot(time_slot, conn):
+                all_users += 1
                 if user.is_limited:
-                    limited_users += 1
+                    cxt_logger = add_context(logger, user_id=user.user_id)
                     cxt_logger.info("Failed to send reminders: User has exceeded free plan max event count")
-                    error_msg = msg.error.reminder_disabled()
+                    error_msg = msg.reminder.reminder_disabled()
                     line_bot_api.push_message(PushMessageRequest(to=user.user_id, messages=[error_msg]))
+                    limited_user_ids.add(user.user_id)
+            logger.info(f"Users found in this time slot: {all_users}")
+
+            limited_users = len(limited_user_ids)
+            user_owned_events = 0
+            shared_events = 0
+            today = datetime.now(TZ_TAIPEI).date()
+            if reminder_index.loaded:
+                reminder_queue_db.refresh_reminder_index(conn)
+                work_set = reminder_index.due(time_slot, today)
+                logger.info(f"Reminders found in the index: {len(work_set)}")
+                reminders = reminder_queue_db.iter_reminders_by_keys(work_set, time_slot, today, conn)
+            else:
+                reminders = reminder_queue_db.iter_due_reminders(time_slot, today, conn)
+            for reminder in reminders:
+                if reminder.recipient_id in limited_user_ids:
                     continue
-                user_owned_events += send_reminders_for_user_owned_events(user.user_id, line_bot_api, conn)
-                shared_events += send_reminders_for_shared_events(user.user_id, line_bot_api, conn)
-                cxt_logger.info("Completed")
-        processed_users = len(users) - limited_users
+                if reminder.recipient_id == reminder.owner_id:
+                    send_user_owned_event_reminder(reminder, line_bot_api)
+                    user_owned_events += 1
+                else:
+                    send_shared_event_reminder(reminder, line_bot_api)
+                    shared_events += 1
+        processed_users = all_users - limited_users
         elapsed_time = time.perf_counter() - start_time
 
         summary = "\n".join(
@@ -103,7 +135,7 @@ async def send_reminder(request: Request):
                 "┌── Sender Summary ─────────────────────────",
                 f"│ Time Slot: {time_slot.strftime('%H:%M')}",
                 f"│ Execution Start: {execution_start}",
-                f"│ All Users: {len(users)}",
+                f"│ All Users: {all_users}",
                 f"│ Processed Users: {processed_users}",
                 f"│ Limited Users: {limited_users}",
                 f"│ All Events Sent: {user_owned_events + shared_events}",
@@ -132,7 +164,7 @@ async def send_reminder(request: Request):
                 "execution_details": {
                     "time_slot": str(time_slot),
                     "execution_start": execution_start.isoformat(),
-                    "all_users": len(users),
+                    "all_users": all_users,
                     "processed_users": processed_users,
                     "limited_users": limited_users,
                     "all_events_sent": user_owned_events + shared_events,
@@ -145,3 +177,261 @@ async def send_reminder(request: Request):
         media_type="application/json",
         status_code=status.HTTP_200_OK,
     )
+
+
+@router.post("/reminder/index/check")
+async def check_reminder_index(request: Request):
+    _verify_sender_token(request)
+
+    if not reminder_index.loaded:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Reminder index is not enabled")
+    try:
+        with psycopg.connect(conninfo=DATABASE_URL) as conn:
+            missing, stale = reminder_queue_db.check_reminder_index(conn)
+    except Exception as e:
+        if ENV == "develop":
+            logger.error(f"An error occurred while checking the reminder index: {e}", exc_info=True)
+        else:
+            logger.error(f"An error occurred while checking the reminder index: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+    return Response(
+        content=json.dumps({"status": "success", "missing": missing, "stale": stale, "entries": len(reminder_index)}),
+        media_type="application/json",
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post("/chats/retention")
+async def run_chat_retention(request: Request):
+    _verify_sender_token(request)
+
+    logger.info("Starting the chat retention process")
+    start_time = time.perf_counter()
+    try:
+        with psycopg.connect(conninfo=DATABASE_URL) as conn:
+            aborted_chats = chat_db.abort_stale_chats(timedelta(hours=CHAT_ONGOING_TTL_HOURS), conn)
+            conn.commit()
+            retention = timedelta(days=CHAT_RETENTION_DAYS)
+            if CHAT_ARCHIVE_ENABLED:
+                removed_chats = chat_db.archive_finished_chats(retention, conn)
+            else:
+                removed_chats = chat_db.delete_finished_chats(retention, conn)
+        elapsed_time = time.perf_counter() - start_time
+
+        summary = "\n".join(
+            [
+                "┌── Chat Retention Summary ─────────────────",
+                f"│ Aborted Stale Chats: {aborted_chats}",
+                f"│ {'Archived' if CHAT_ARCHIVE_ENABLED else 'Deleted'} Chats: {removed_chats}",
+                f"│ Elapsed Time: {round(elapsed_time)} sec",
+                "└───────────────────────────────────────────",
+            ]
+        )
+        logger.info(f"Chat retention process completed\n{indent(summary)}")
+
+    except Exception as e:
+        if ENV == "develop":
+            logger.error(f"An error occurred while running chat retention: {e}", exc_info=True)
+        else:
+            logger.error(f"An error occurred while running chat retention: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+    return Response(
+        content=json.dumps(
+            {
+                "status": "success",
+                "execution_details": {
+                    "aborted_chats": aborted_chats,
+                    "archived_chats" if CHAT_ARCHIVE_ENABLED else "deleted_chats": removed_chats,
+                    "elapsed_time_sec": round(elapsed_time),
+                },
+            }
+        ),
+        media_type="application/json",
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post("/records/compaction")
+async def run_record_compaction(request: Request):
+    _verify_sender_token(request)
+
+    logger.info("Starting the record compaction process")
+    start_time = time.perf_counter()
+    horizon = record_db.get_record_history_start(datetime.now(TZ_TAIPEI).date())
+    try:
+        with psycopg.connect(conninfo=DATABASE_URL) as conn:
+            partitions, records = record_db.compact_records_before(horizon, conn)
+        elapsed_time = time.perf_counter() - start_time
+
+        summary = "\n".join(
+            [
+                "┌── Record Compaction Summary ──────────────",
+                f"│ Horizon: {horizon.strftime('%Y-%m')}",
+                f"│ Compacted Partitions: {partitions}",
+                f"│ Compacted Records: {records}",
+                f"│ Elapsed Time: {round(elapsed_time)} sec",
+                "└───────────────────────────────────────────",
+            ]
+        )
+        logger.info(f"Record compaction process completed\n{indent(summary)}")
+
+    except Exception as e:
+        if ENV == "develop":
+            logger.error(f"An error occurred while compacting records: {e}", exc_info=True)
+        else:
+            logger.error(f"An error occurred while compacting records: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+    return Response(
+        content=json.dumps(
+            {
+                "status": "success",
+                "execution_details": {
+                    "horizon": horizon.isoformat(),
+                    "compacted_partitions": partitions,
+                    "compacted_records": records,
+                    "elapsed_time_sec": round(elapsed_time),
+                },
+            }
+        ),
+        media_type="application/json",
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post("/counters/reconcile")
+async def run_counter_reconciliation(request: Request):
+    _verify_sender_token(request)
+
+    logger.info("Starting the counter reconciliation process")
+    start_time = time.perf_counter()
+    try:
+        with psycopg.connect(conninfo=DATABASE_URL) as conn:
+            corrected_users = user_db.reconcile_user_event_counts(conn)
+            corrected_events = event_db.reconcile_event_share_counts(conn)
+        elapsed_time = time.perf_counter() - start_time
+
+        summary = "\n".join(
+            [
+                "┌── Counter Reconciliation Summary ─────────",
+                f"│ Corrected event_count: {len(corrected_users)}",
+                f"│ Corrected share_count: {len(corrected_events)}",
+                f"│ Elapsed Time: {round(elapsed_time)} sec",
+                "└───────────────────────────────────────────",
+            ]
+        )
+        logger.info(f"Counter reconciliation process completed\n{indent(summary)}")
+
+    except Exception as e:
+        if ENV == "develop":
+            logger.error(f"An error occurred while reconciling counters: {e}", exc_info=True)
+        else:
+            logger.error(f"An error occurred while reconciling counters: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+    return Response(
+        content=json.dumps(
+            {
+                "status": "success",
+                "execution_details": {
+                    "corrected_event_counts": [
+                        {"user_id": user_id, "old_count": old_count, "new_count": new_count}
+                        for user_id, old_count, new_count in corrected_users
+                    ],
+                    "corrected_share_counts": [
+                        {"event_id": event_id, "old_count": old_count, "new_count": new_count}
+                        for event_id, old_count, new_count in corrected_events
+                    ],
+                    "elapsed_time_sec": round(elapsed_time),
+                },
+            }
+        ),
+        media_type="application/json",
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post("/events/next-due/recompute")
+async def run_next_due_recompute(request: Request):
+    """
+    Recompute every event's `next_due_at` from its last completion and cycle.
+
+    Query parameters: `dry_run` (default true) only reports the drift, `user_id` limits the run to one user, and
+    `after` resumes an interrupted run from the `last_event_id` it reported.
+    """
+    _verify_sender_token(request)
+
+    dry_run = request.query_params.get("dry_run", "true").lower() != "false"
+    user_id = request.query_params.get("user_id")
+    after = request.query_params.get("after")
+    logger.info("Starting the next due date recompute process")
+    start_time = time.perf_counter()
+    try:
+        with psycopg.connect(conninfo=DATABASE_URL) as conn:
+            checked, drifted, samples, last_event_id = event_db.reconcile_next_due_at(
+                conn, user_id=user_id, after=after, dry_run=dry_run
+            )
+        elapsed_time = time.perf_counter() - start_time
+
+        summary = "\n".join(
+            [
+                "┌── Next Due Recompute Summary ─────────────",
+                f"│ Dry Run: {dry_run}",
+                f"│ User: {user_id or 'all'}",
+                f"│ Checked Events: {checked}",
+                f"│ Drifted Events: {drifted}",
+                f"│ Last Event ID: {last_event_id}",
+                f"│ Elapsed Time: {round(elapsed_time)} sec",
+                "└───────────────────────────────────────────",
+            ]
+        )
+        logger.info(f"Next due date recompute process completed\n{indent(summary)}")
+
+    except Exception as e:
+        if ENV == "develop":
+            logger.error(f"An error occurred while recomputing next due dates: {e}", exc_info=True)
+        else:
+            logger.error(f"An error occurred while recomputing next due dates: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+    return Response(
+        content=json.dumps(
+            {
+                "status": "success",
+                "execution_details": {
+                    "dry_run": dry_run,
+                    "checked_events": checked,
+                    "drifted_events": drifted,
+                    "drift_samples": [
+                        {
+                            "event_id": event_id,
+                            "old_next_due_at": old_next_due_at.isoformat() if old_next_due_at else None,
+                            "new_next_due_at": new_next_due_at.isoformat(),
+                        }
+                        for event_id, old_next_due_at, new_next_due_at in samples
+                    ],
+                    "last_event_id": last_event_id,
+                    "elapsed_time_sec": round(elapsed_time),
+                },
+            }
+        ),
+        media_type="application/json",
+        status_code=status.HTTP_200_OK,
+    )
@@ -0,0 +1,91 @@
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date
+
+from linebot.v3.messaging import FlexMessage
+
+from routine_bot.invalidation import invalidation_bus
+from routine_bot.logger import format_logger_name
+
+logger = logging.getLogger(format_logger_name(__name__))
+
+
+class SummaryCache:
+    """
+    In-process cache of the rendered /viewall summary of each user, valid for one local date.
+
+    Every entry remembers the events it lists, so the mutation functions in `db/` can evict it by event without
+    knowing who the owner and recipients are. Adding an event or a share evicts by user instead, since the new
+    event is not listed anywhere yet. All entries are dropped when the local date rolls over, as the rendered
+    time differences change with it.
+
+    Evictions arrive through the invalidation bus, so writes made by other processes evict here too. Local
+    evictions happen when the statement runs, not when the transaction commits, so a summary rebuilt by a
+    concurrent request in between can stay stale until the next eviction or rollover.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._today: date | None = None
+        self._summaries: dict[str, FlexMessage] = {}
+        # user_id -> event_ids listed in the user's summary
+        self._event_ids: dict[str, set[str]] = {}
+        self._users_by_event: dict[str, set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def _remove(self, user_id: str) -> None:
+        self._summaries.pop(user_id, None)
+        for event_id in self._event_ids.pop(user_id, ()):
+            users = self._users_by_event[event_id]
+            users.discard(user_id)
+            if not users:
+                del self._users_by_event[event_id]
+
+    def _roll_over(self, today: date) -> None:
+        if self._today == today:
+            return
+        if self._summaries:
+            logger.debug(f"Summary cache cleared on date rollover: {len(self._summaries)} entries")
+        self._summaries.clear()
+        self._event_ids.clear()
+        self._users_by_event.clear()
+        self._today = today
+
+    def get(self, user_id: str, today: date) -> FlexMessage | None:
+        with self._lock:
+            self._roll_over(today)
+            return self._summaries.get(user_id)
+
+    def put(self, user_id: str, today: date, event_ids: Iterable[str], summary: FlexMessage) -> None:
+        with self._lock:
+            self._roll_over(today)
+            self._remove(user_id)
+            self._summaries[user_id] = summary
+            self._event_ids[user_id] = set(event_ids)
+            for event_id in self._event_ids[user_id]:
+                self._users_by_event[event_id].add(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._summaries.clear()
+            self._event_ids.clear()
+            self._users_by_event.clear()
+
+    def discard_user(self, user_id: str) -> None:
+        with self._lock:
+            self._remove(user_id)
+
+    def discard_event(self, event_id: str) -> None:
+        with self._lock:
+            for user_id in list(self._users_by_event.get(event_id, ())):
+                self._remove(user_id)
+
+
+summary_cache = SummaryCache()
+invalidation_bus.subscribe("event", summary_cache.discard_event)
+invalidation_bus.subscribe("user", summary_cache.discard_user)
+invalidation_bus.subscribe_clear(summary_cache.clear)
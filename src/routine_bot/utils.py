@@ -1,19 +1,42 @@
+import base64
+import hashlib
+import hmac
 import logging
+import os
 import re
+import time
+import uuid
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date
+from urllib.parse import parse_qsl
 
 import requests
 from cachetools.func import ttl_cache
 from dateutil.relativedelta import relativedelta
 
-from routine_bot.constants import LINE_CHANNEL_ACCESS_TOKEN
+from routine_bot.constants import LINE_CHANNEL_ACCESS_TOKEN, LINE_CHANNEL_SECRET
 from routine_bot.enums.units import SUPPORTED_UNITS
 from routine_bot.logger import format_logger_name
 
 logger = logging.getLogger(format_logger_name(__name__))
 
 
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUIDv7 (RFC 9562): a 48-bit millisecond timestamp followed by random bits.
+
+    Keys generated this way land at the right edge of the primary key B-tree instead of random positions.
+    """
+    unix_ts_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10))
+    value = (unix_ts_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= ((rand >> 62) & 0xFFF) << 64
+    value |= 0b10 << 62
+    value |= rand & ((1 << 62) - 1)
+    return uuid.UUID(int=value)
+
+
 def _camel_to_snake(text):
     return re.sub(r"(?<!^)(?=[A-Z])", "_", text).lower()
 
@@ -85,7 +108,7 @@ def parse_event_cycle(text: str) -> tuple[int | None, str | None]:
     return value, unit
 
 
-def get_time_diff(dt1: datetime, dt2: datetime) -> str:
+def get_time_diff(dt1: date, dt2: date) -> str:
     """
     Get the verbal expression of the date difference.
 
@@ -108,3 +131,28 @@ def get_time_diff(dt1: datetime, dt2: datetime) -> str:
     if dt2 < dt1:
         return f"{time_diff}前"
     return time_diff
+
+
+def parse_postback_data(data: str) -> dict[str, str]:
+    """
+    Parse postback data into its fields.
+
+    Date pickers carry the bare chat id, while the event picker carries a query string with `chat_id` and
+    either `event_id` or `page`. Reminder buttons carry `action`, `event_id` and `sig` without a chat.
+    """
+    if "=" not in data:
+        return {"chat_id": data}
+    return dict(parse_qsl(data))
+
+
+def sign_event_action(action: str, event_id: str, user_id: str) -> str:
+    """
+    Sign a one-tap event action for the user it is sent to, so the postback cannot be forged or used by others.
+    """
+    message = f"{action}:{event_id}:{user_id}".encode()
+    digest = hmac.new(LINE_CHANNEL_SECRET.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).rstrip(b"=").decode()
+
+
+def verify_event_action(action: str, event_id: str, user_id: str, signature: str) -> bool:
+    return hmac.compare_digest(sign_event_action(action, event_id, user_id), signature)